@@ -0,0 +1,97 @@
+"""
+Benchmark for the DDL parser.
+
+Parses a single CREATE TABLE with 5,000 columns and a generated schema dump (100 MB by
+default) and reports the time and throughput of each run. The dump is also written to a
+temporary file to time the memory-mapped scan mode and a single table lookup:
+
+    python -m benchmarks.bench_ddl_parser
+    python -m benchmarks.bench_ddl_parser --columns 5000 --dump-mb 100 --repeat 3
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from scripts.utils.ddl_parser import parse_ddl, read_ddl_statements, scan_ddl_file
+
+COLUMN_TEMPLATES = [
+    '    COL_{0}_ID NUMBER(38,0) NOT NULL',
+    '    "Col {0} Name" VARCHAR(200) COMMENT \'name, (free text); col {0}\'',
+    '    COL_{0}_AMT NUMBER(18,2) DEFAULT 0 /* amount, (cents) */',
+    '    COL_{0}_DT TIMESTAMP_NTZ(9) DEFAULT CAST(CURRENT_TIMESTAMP() AS TIMESTAMP_NTZ(9))',
+    '    -- code column {0}\n    COL_{0}_CD VARCHAR(10) UNIQUE',
+]
+
+
+def build_table_ddl(table_name, column_count):
+    """Build a CREATE TABLE statement with the given number of columns"""
+    lines = [COLUMN_TEMPLATES[i % len(COLUMN_TEMPLATES)].format(i) for i in range(column_count)]
+    lines.append('    CONSTRAINT PK_{0} PRIMARY KEY (COL_0_ID)'.format(table_name.split('.')[-1]))
+    return 'CREATE OR REPLACE TABLE {0} (\n{1}\n);\n'.format(table_name, ',\n'.join(lines))
+
+
+def build_schema_dump(size_mb, columns_per_table=40):
+    """Build a schema dump of roughly size_mb megabytes of CREATE TABLE statements"""
+    target = size_mb * 1024 * 1024
+    statements = []
+    size = 0
+    table_index = 0
+    while size < target:
+        statement = build_table_ddl(f'EBI_DEV_DB.EDW.TABLE_{table_index}', columns_per_table)
+        statements.append(statement)
+        size += len(statement)
+        table_index += 1
+    return ''.join(statements)
+
+
+def run(label, text, repeat):
+    """Parse text repeat times and print the best timing"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tables = parse_ddl(text)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    column_count = sum(len(table.columns) for table in tables)
+    size_mb = len(text) / (1024 * 1024)
+    print(f"{label}: {len(tables)} tables, {column_count} columns, {size_mb:.1f} MB "
+          f"in {best:.3f}s ({size_mb / best:.1f} MB/s)")
+
+
+def run_scan(text):
+    """Time the scan of a DDL file and the lookup of its last table"""
+    with tempfile.NamedTemporaryFile('w', suffix='.sql', delete=False) as f:
+        f.write(text)
+    try:
+        start = time.perf_counter()
+        index = scan_ddl_file(f.name)
+        scan_time = time.perf_counter() - start
+
+        # Parse only the statements of the last table, as scan mode does for large files
+        start = time.perf_counter()
+        table = parse_ddl(read_ddl_statements(f.name, index[list(index)[-1]]))[0]
+        lookup_time = time.perf_counter() - start
+    finally:
+        os.remove(f.name)
+
+    size_mb = len(text) / (1024 * 1024)
+    print(f"scan mode: {len(index)} tables located in {size_mb:.1f} MB in {scan_time:.3f}s "
+          f"({size_mb / scan_time:.1f} MB/s), {table.name} parsed in {lookup_time * 1000:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DDL parser benchmark')
+    parser.add_argument('--columns', type=int, default=5000, help='Columns in the wide table DDL')
+    parser.add_argument('--dump-mb', type=int, default=100, help='Size of the generated schema dump in MB')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per case, the best is reported')
+    args = parser.parse_args()
+
+    run(f"{args.columns} column table", build_table_ddl('EBI_DEV_DB.EDW.WIDE_TABLE', args.columns), args.repeat)
+    dump = build_schema_dump(args.dump_mb)
+    run(f"{args.dump_mb} MB schema dump", dump, args.repeat)
+    run_scan(dump)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark for rendering the dbt model of wide tables.
+
+Renders the model SELECT of synthetic tables (1,000, 3,000 and 5,000 columns by default) the
+way it was built before, one `+=` per column followed by `rstrip`, and with the list based
+renderer in dbt_model_generator. Reports the best time and the peak memory allocated while
+rendering, measured with tracemalloc:
+
+    python -m benchmarks.bench_model_render
+    python -m benchmarks.bench_model_render --columns 1000 3000 5000 --repeat 5
+"""
+import argparse
+import time
+import tracemalloc
+
+from benchmarks.bench_sql_formatter import build_wide_model
+from scripts.dbt_model_generator import render_model_sql
+from scripts.model_ir import quote_identifier
+from scripts.utils.templates import render_template
+
+
+def render_concatenated(model_ir, model_header):
+    """The previous renderer: grow the model string one column and clause at a time"""
+    model_content = model_header + "SELECT\n"
+    for column in model_ir.select_columns:
+        model_content += f"    {column.logic} as {quote_identifier(str(column.target_column))},\n"
+    model_content = model_content.rstrip(',\n')
+    model_content += f"\nFROM {{{{ ref('{model_ir.source_schema}.{model_ir.source_table}') }}}} AS source"
+    if model_ir.join_clauses:
+        model_content += "\n" + "\n".join(model_ir.join_clauses)
+    if model_ir.where_condition:
+        model_content += f"\nWHERE {model_ir.where_condition}"
+    if model_ir.group_by:
+        model_content += f"\nGROUP BY {model_ir.group_by}"
+    return model_content
+
+
+def run(label, render, repeat):
+    """Call render repeat times and print the best timing and the peak allocation"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        sql = render()
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+
+    tracemalloc.start()
+    render()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label}: {len(sql) / 1024:.0f} KB in {best * 1000:.1f} ms, peak {peak / 1024:.0f} KB")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--columns', type=int, nargs='+', default=[1000, 3000, 5000], help='Mapped columns per table')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement, best is reported')
+    args = parser.parse_args()
+
+    for column_count in args.columns:
+        model_ir = build_wide_model(column_count)
+        # The config block is identical for both renderers, so only the SELECT is compared
+        model_ir.materialization = 'table'
+        model_header = render_template(
+            'model_header',
+            model_config='',
+            target_name=model_ir.target_name,
+            source_db=model_ir.source_db,
+            source_schema=model_ir.source_schema,
+            source_table=model_ir.source_table
+        )
+        concatenated = run(f"{column_count} columns, concatenated",
+                           lambda: render_concatenated(model_ir, model_header), args.repeat)
+        joined = run(f"{column_count} columns, joined once",
+                     lambda: render_model_sql(model_ir)[1], args.repeat)
+        print(f"  speedup: {concatenated / joined:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
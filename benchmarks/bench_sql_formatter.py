@@ -0,0 +1,92 @@
+"""
+Benchmark for the SQL formatters.
+
+Renders the MERGE and INSERT macros of synthetic wide tables (100, 1,000 and 2,000 columns
+by default) with the fast formatter and with sqlparse, and reports the best time of each.
+sqlparse 0.5+ gives up on statements of more than 10,000 tokens, which wide MERGE statements
+exceed; such failures are reported with the time spent before them.
+
+    python -m benchmarks.bench_sql_formatter
+    python -m benchmarks.bench_sql_formatter --columns 100 1000 2000 --repeat 3
+"""
+import argparse
+import time
+
+from scripts.insert_sql_generator import render_insert_sql
+from scripts.merge_sql_generator import render_merge_sql
+from scripts.model_ir import build_model_ir
+from scripts.utils.column_model import ColumnMapping
+from scripts.utils.sql_formatter import FAST_FORMATTER, SQLPARSE_FORMATTER, sqlparse
+
+LOGIC_TEMPLATES = [
+    'COL_{0}',
+    'UPPER(TRIM(COL_{0}))',
+    "COALESCE(items.COL_{0}, 'N/A')",
+    'CASE WHEN COL_{0} > 0 THEN COL_{0} ELSE NULL END',
+]
+
+
+def build_wide_model(column_count):
+    """Build the model IR of a table with the given number of mapped columns"""
+    columns = [ColumnMapping('COL_0_ID', 'EDW.WIDE_VW', 'COL_0_ID')]
+    columns.extend(
+        ColumnMapping(f'COL_{i}', 'EDW.WIDE_VW', LOGIC_TEMPLATES[i % len(LOGIC_TEMPLATES)].format(i))
+        for i in range(1, column_count)
+    )
+    config = {
+        'Source': {'Type': 'ref', 'Database': 'EBI_DEV_DB', 'Schema': 'EDW', 'Table Name': 'WIDE_VW', 'Name': 'EDW'},
+        'Target': {'Schema': 'DW', 'Table Name': 'F_WIDE', 'materialization': 'incremental',
+                   'unique_key': ['COL_0_ID']},
+        'Columns': columns
+    }
+    model_ir = build_model_ir(config)
+    model_ir.join_clauses = ["LEFT JOIN {{ ref('LND_CORE.D_ITEM') }} AS items ON source.COL_0_ID = items.COL_0_ID"]
+    model_ir.where_condition = 'source.ACTIVE_FLG = 1'
+    return model_ir
+
+
+def run(label, render, repeat):
+    """Call render repeat times and return the best timing, or None if it fails"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            sql = render()
+        except Exception as e:
+            print(f"{label}: failed after {time.perf_counter() - start:.3f}s ({type(e).__name__}: {e})")
+            return None
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    print(f"{label}: {len(sql) / 1024:.0f} KB in {best:.3f}s")
+    return best
+
+
+def format_with_sqlparse(render, model_ir):
+    """Render with the fast layout, then re-indent the whole macro with sqlparse"""
+    model_ir.sql_formatter = FAST_FORMATTER
+    _, sql = render(model_ir)
+    return sqlparse.format(sql, reindent_aligned=True, indent_tabs=True, keyword_case='upper')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--columns', type=int, nargs='+', default=[100, 1000, 2000], help='Mapped columns per table')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement, best is reported')
+    args = parser.parse_args()
+
+    for column_count in args.columns:
+        model_ir = build_wide_model(column_count)
+        for statement, render in (('MERGE', render_merge_sql), ('INSERT', render_insert_sql)):
+            model_ir.sql_formatter = FAST_FORMATTER
+            fast = run(f"{statement} {column_count} columns, {FAST_FORMATTER}",
+                       lambda: render(model_ir)[1], args.repeat)
+            if sqlparse is None:
+                continue
+            slow = run(f"{statement} {column_count} columns, {SQLPARSE_FORMATTER}",
+                       lambda: format_with_sqlparse(render, model_ir), args.repeat)
+            if fast and slow:
+                print(f"  speedup: {slow / fast:.0f}x")
+
+
+if __name__ == '__main__':
+    main()
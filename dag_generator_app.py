@@ -26,7 +26,16 @@ from scripts.dbt_job_generator import create_dbt_job_file
 from scripts.dbt_model_generator import create_dbt_model_from_json
 from scripts.insert_sql_generator import insert_sql_generator
 from scripts.merge_sql_generator import merge_sql_generator
+from scripts.model_ir import build_model_ir
 from scripts.generate_lnd_dbt_model_file import generate_lnd_dbt_model_file,create_dp_view_file,create_test_model_file
+from scripts.utils.artifact_writer import artifact_stats
+from scripts.utils.column_model import ColumnMapping, save_model_config
+from scripts.utils.ddl_catalog import DDLCatalog
+from scripts.utils.ddl_parser import get_table_definition
+from scripts.utils.excel_utils import get_config_from_sheet, is_mapping_option_enabled
+from scripts.utils.file_utils import extract_table_name
+from scripts.utils.key_profiler import profile_unique_key
+from scripts.utils.snowflake_instrumentation import instrumentation
 
 
 # Configure logging
@@ -142,8 +151,6 @@ def generate_safe_timestamp():
 class DAGGeneratorApp:
     def __init__(self, root):
         """Initialize the application"""
-        self.primary_keys = None
-        self.unique_keys = None
         self.status_bar = None
         self.mapping_tab = None
         self.main_tab = None
@@ -194,6 +201,9 @@ class DAGGeneratorApp:
         # Initialize ModelMapper
         self.model_mapper = None
 
+        # Index of the tables defined in known DDL files
+        self.ddl_catalog = DDLCatalog()
+
         # Initialize UI
         self.init_ui()
 
@@ -219,6 +229,10 @@ class DAGGeneratorApp:
             
             # Load history
             self.load_history()
+
+            # Bring the DDL catalog up to date with changed and recently used DDL files
+            self.ddl_catalog.refresh()
+            self.ddl_catalog.add_files(self.ddl_file_history)
             
             # Update UI with loaded resources
             self.root.after(0, self.update_ui_with_resources)
@@ -487,6 +501,13 @@ class DAGGeneratorApp:
         )
         self.ddl_combo.pack(side='left', fill='x', expand=True, padx=(0, 10))
 
+        ttk.Button(
+            input_frame,
+            text="Add Folder",
+            command=self.browse_ddl_folder,
+            width=10
+        ).pack(side='right', padx=(10, 0))
+
         ttk.Button(
             input_frame,
             text="Browse",
@@ -569,6 +590,8 @@ class DAGGeneratorApp:
         self.set_status("Generating files...")
         self.show_progress()
         self.generate_button.configure(state='disabled')
+        instrumentation.reset()
+        artifact_stats.reset()
         
         # Run in a separate thread to keep UI responsive
         threading.Thread(target=self.run_generation).start()
@@ -585,11 +608,20 @@ class DAGGeneratorApp:
         """Clean up after generation process completes"""
         self.generate_button.configure(state='normal')
         self.hide_progress()
-        self.set_status("Ready")
+        self.set_status(self.get_run_status("Ready"))
 
     def set_status(self, message):
         """Update status bar message"""
         self.status_label.config(text=message)
+
+    def get_run_status(self, message):
+        """Log the Snowflake usage and written files of the last run and append them to a status message"""
+        instrumentation.log_summary()
+        files = artifact_stats.format_summary()
+        if files:
+            logging.info(files)
+        summaries = [summary for summary in (instrumentation.format_summary(), files) if summary]
+        return " | ".join([message] + summaries)
         
     def show_progress(self):
         """Show progress bar"""
@@ -775,11 +807,11 @@ class DAGGeneratorApp:
                         break
                     continue
                     
-                column_mappings.append({
-                    'Target Column': target_column,
-                    'Source Table': source_table_col,
-                    'Logic': logic if logic is not None else "''"
-                })
+                column_mappings.append(ColumnMapping(
+                    target_column,
+                    source_table_col,
+                    logic if logic is not None else "''"
+                ))
             
             # Create model configuration
             model_config = {
@@ -799,51 +831,36 @@ class DAGGeneratorApp:
                 'Columns': column_mappings
             }
             
-            # Check if we need to add unique keys for incremental models
-            if materialization == 'incremental':
-                # Try to get unique keys from the DDL file if we have it
-                unique_keys = []
-                primary_keys = []
-                ddl_unique_keys_found = False
-                
-                # First check if we have a DDL file path directly specified
-                ddl_path = None
+            # Look up the target table DDL; it gives the unique keys and the column order
+            table = None
+            try:
                 if hasattr(self, 'ddl_file_path') and self.ddl_file_path.get():
                     ddl_path = self.ddl_file_path.get()
                     logging.info(f"Using explicitly specified DDL file: {ddl_path}")
+                    if os.path.exists(ddl_path):
+                        table = get_table_definition(ddl_path, f"{target_schema}.{target_table_name}")
                 else:
-                    # Try to find a matching DDL file in history
-                    logging.info("Looking for matching DDL file in history...")
+                    # Look up the target table in the DDL catalog
+                    logging.info("Looking for target table in the DDL catalog...")
                     # Extract table name from target table
                     target_table_name = target_table_name.upper()
-                    
-                    # Look through DDL file history for a matching file
-                    for history_ddl_path in self.ddl_file_history:
-                        if os.path.exists(history_ddl_path):
-                            # Check if the DDL file contains the target table name
-                            try:
-                                with open(history_ddl_path, 'r') as f:
-                                    ddl_content = f.read()
-                                    # Simple check if the table name appears in the DDL
-                                    if f"CREATE TABLE {target_schema}.{target_table_name}" in ddl_content.upper() or \
-                                       f"CREATE TABLE \"{target_schema}\".\"{target_table_name}\"" in ddl_content.upper():
-                                        ddl_path = history_ddl_path
-                                        logging.info(f"Found matching DDL file in history: {ddl_path}")
-                                        break
-                            except Exception as e:
-                                logging.error(f"Error checking DDL file {history_ddl_path}: {str(e)}")
+                    table = self.ddl_catalog.get_table_definition(f"{target_schema}.{target_table_name}")
+                    if table:
+                        logging.info(f"Found matching DDL in catalog: {self.ddl_catalog.find_file(table.name)}")
+            except Exception as e:
+                logging.error(f"Error reading target table DDL: {str(e)}")
+            
+            # Check if we need to add unique keys for incremental models
+            if materialization == 'incremental':
+                # Try to get unique keys from the DDL file if we have it
+                unique_keys = []
+                primary_keys = []
+                ddl_unique_keys_found = False
                 
-                if ddl_path and os.path.exists(ddl_path):
-                    logging.info(f"DDL file exists: {ddl_path}")
+                if table:
                     try:
-                        # Log first few lines of the DDL file for debugging
-                        with open(ddl_path, 'r') as f:
-                            ddl_content = f.read(500)  # Read first 500 chars
-                            logging.debug(f"DDL file content (first 500 chars):\n{ddl_content}")
-                        
-                        _, unique_keys = self.parse_ddl_file(ddl_path)
-                        if hasattr(self, 'primary_keys'):
-                            primary_keys = self.primary_keys
+                        unique_keys = list(table.unique_keys)
+                        primary_keys = list(table.primary_keys)
                         
                         # If we found unique keys in the DDL, mark that we should use these directly
                         if unique_keys:
@@ -857,14 +874,7 @@ class DAGGeneratorApp:
                     except Exception as e:
                         logging.error(f"Error extracting keys from DDL: {str(e)}")
                 else:
-                    logging.info("No matching DDL file found in history")
-                
-                # If we have unique keys stored from previous parsing, use those
-                if not unique_keys and hasattr(self, 'unique_keys') and self.unique_keys:
-                    unique_keys = self.unique_keys
-                    if unique_keys:
-                        ddl_unique_keys_found = True
-                        logging.info(f"Using stored unique keys from DDL: {unique_keys}")
+                    logging.info("No matching DDL file found")
                 
                 # Check if unique keys are specified in the mapping sheet
                 if not ddl_unique_keys_found:
@@ -883,13 +893,31 @@ class DAGGeneratorApp:
                                 break
                     except Exception as e:
                         logging.error(f"Error checking for unique keys in mapping sheet: {str(e)}")
+
+                # Optionally profile the source table before falling back to name patterns
+                if (not unique_keys and not ddl_unique_keys_found and
+                        is_mapping_option_enabled(mapping_sheet, 'PROFILE_UNIQUE_KEY')):
+                    try:
+                        if 'Config' not in workbook.sheetnames:
+                            raise ValueError("Config sheet with Snowflake settings not found")
+                        unique_keys = profile_unique_key(
+                            get_config_from_sheet(workbook['Config']),
+                            source_table,
+                            column_mappings
+                        )
+                        if unique_keys:
+                            logging.info(f"Using profiled unique keys: {unique_keys}")
+                        else:
+                            logging.info("Profiling found no unique column combination")
+                    except Exception as e:
+                        logging.error(f"Error profiling unique keys: {str(e)}")
                 
                 # Only if we didn't find unique keys in DDL or mapping sheet, try pattern-based detection
                 if not unique_keys and not ddl_unique_keys_found:
                     # First, check for columns with _CD suffix (common for unique business keys)
                     cd_columns = []
                     for column in column_mappings:
-                        target_col = column['Target Column']
+                        target_col = column.target_column
                         if target_col.endswith('_CD'):
                             cd_columns.append(target_col)
                     
@@ -900,7 +928,7 @@ class DAGGeneratorApp:
                         # Look for ID columns or primary key candidates
                         id_columns = []
                         for column in column_mappings:
-                            target_col = column['Target Column']
+                            target_col = column.target_column
                             # Check for common ID column patterns
                             if (target_col.endswith('_ID') or 
                                 target_col.endswith('_KEY') or 
@@ -918,7 +946,7 @@ class DAGGeneratorApp:
                         else:
                             # If no ID columns found, use the first column as a fallback
                             if column_mappings:
-                                unique_keys = [column_mappings[0]['Target Column']]
+                                unique_keys = [column_mappings[0].target_column]
                                 logging.info(f"Using first column as unique key: {unique_keys}")
                 
                 # Add unique keys to the model config if we have any
@@ -927,14 +955,16 @@ class DAGGeneratorApp:
                     model_config['Target']['unique_key'] = unique_keys
             
             # Save model configuration to JSON
-            with open(json_output_path, 'w') as f:
-                json.dump(model_config, f, indent=2)
+            save_model_config(model_config, json_output_path)
+
+            # Analyse the model once; every generator below only renders it
+            model_ir = build_model_ir(model_config, mapping_sheet, table)
                 
             # Generate DBT model
             model_dbt_job_additon_flg=False
             model_file_path = None
             if self.generate_model_var.get():
-                model_dbt_job_additon_flg,model_file_path = create_dbt_model_from_json(json_output_path, mapping_sheet, self.ddl_file_path.get())
+                model_dbt_job_additon_flg,model_file_path = create_dbt_model_from_json(json_output_path, mapping_sheet, model_ir=model_ir)
             
             # Generate DAG file if requested
             dag_file_path = None
@@ -945,13 +975,13 @@ class DAGGeneratorApp:
             merge_macro_file_path = None
             merge_dbt_job_additon_flg=False
             if self.generate_merge_macro_var.get():
-                merge_dbt_job_additon_flg,merge_macro_file_path = merge_sql_generator(json_output_path,mapping_sheet, merge_macro_file_path)
+                merge_dbt_job_additon_flg,merge_macro_file_path = merge_sql_generator(json_output_path, mapping_sheet, model_ir=model_ir)
 
             # Generate insert_macro file if requested
             insert_macro_file_path = None
             insert_dbt_job_additon_flg = False
             if self.generate_insert_macro_var.get():
-                insert_dbt_job_additon_flg,insert_macro_file_path = insert_sql_generator(json_output_path,mapping_sheet, insert_macro_file_path)
+                insert_dbt_job_additon_flg,insert_macro_file_path = insert_sql_generator(json_output_path, mapping_sheet, model_ir=model_ir)
 
             # Generate lnd_model file if requested
             lnd_model_file_path = None
@@ -1177,6 +1207,25 @@ class DAGGeneratorApp:
         else:
             messagebox.showerror("Error", "DAG directory does not exist.")
 
+    def browse_ddl_folder(self):
+        """Add every DDL file in a folder to the DDL catalog"""
+        folder = filedialog.askdirectory(title="Select DDL Folder")
+        if folder:
+            self.set_status(f"Indexing DDL files in {folder}...")
+            self.show_progress()
+            threading.Thread(target=self.run_ddl_folder_indexing, args=(folder,), daemon=True).start()
+
+    def run_ddl_folder_indexing(self, folder):
+        """Index a DDL folder in a separate thread"""
+        try:
+            changed = self.ddl_catalog.add_folder(folder)
+            message = f"Indexed {changed} new or changed DDL files from {folder}"
+        except Exception as e:
+            logging.error(f"Error indexing DDL folder {folder}: {str(e)}")
+            message = f"Error indexing DDL folder: {str(e)}"
+        self.root.after(0, self.hide_progress)
+        self.root.after(0, lambda: self.set_status(message))
+
     def browse_ddl_file(self):
         """Browse for DDL file"""
         file_path = filedialog.askopenfilename(
@@ -1187,6 +1236,7 @@ class DAGGeneratorApp:
             self.ddl_file_path.set(file_path)
             self.add_to_history(file_path, self.ddl_file_history)
             self.ddl_combo['values'] = self.ddl_file_history
+            threading.Thread(target=self.ddl_catalog.add_files, args=([file_path],), daemon=True).start()
             
             # Create mappings directory if it doesn't exist
             # Use a more reliable path - create mappings in the current workspace
@@ -1242,9 +1292,6 @@ class DAGGeneratorApp:
             # Parse DDL file to extract columns
             columns, unique_keys = self.parse_ddl_file(self.ddl_file_path.get())
             
-            # Store unique keys for later use
-            self.unique_keys = unique_keys
-            
             # Update the mapping sheet with columns
             self.update_mapping_sheet((columns, unique_keys))
             
@@ -1273,6 +1320,8 @@ class DAGGeneratorApp:
         self.set_status("Connecting to Snowflake and updating mapping...")
         self.show_progress()
         self.fill_mapping_button.configure(state='disabled')
+        instrumentation.reset()
+        artifact_stats.reset()
         
         # Run in a separate thread
         threading.Thread(target=self.run_model_mapping).start()
@@ -1359,157 +1408,22 @@ class DAGGeneratorApp:
         """Clean up after model mapping completes"""
         self.fill_mapping_button.configure(state='normal')
         self.hide_progress()
-        self.set_status("Ready")
+        self.set_status(self.get_run_status("Ready"))
 
     def parse_ddl_file(self, ddl_path):
         """Parse DDL file to extract column names, data types, and default values"""
         try:
-            with open(ddl_path, 'r') as file:
-                ddl_content = file.read()
-            
             logging.info(f"Parsing DDL file: {ddl_path}")
+            table = get_table_definition(ddl_path)
 
-            # Find the create table statement
-            create_table_pattern = r'CREATE\s+TABLE\s+.*?\((.*?)\)[^)]*$'
-            match = re.search(create_table_pattern, ddl_content, re.DOTALL | re.IGNORECASE)
-            
-            if not match:
-                raise Exception("Could not find CREATE TABLE statement in DDL file")
-            
-            columns_text = match.group(1)
-            # Split by commas, but be careful with commas inside parentheses (for functions, etc.)
-            column_definitions = []
-            current_def = ""
-            paren_level = 0
-            
-            for char in columns_text:
-                if char == '(':
-                    paren_level += 1
-                    current_def += char
-                elif char == ')':
-                    paren_level -= 1
-                    current_def += char
-                elif char == ',' and paren_level == 0:
-                    column_definitions.append(current_def.strip())
-                    current_def = ""
-                else:
-                    current_def += char
-                    
-            # Add the last definition if it exists
-            if current_def.strip():
-                column_definitions.append(current_def.strip())
-                
-            columns = []
-            unique_keys = []
-            primary_keys = []
-
-            # First pass: extract all column names
-            all_column_names = []
-            for definition in column_definitions:
-                if not definition:
-                    continue
-                    
-                # Skip constraints for now
-                if re.match(r'^\s*(PRIMARY|FOREIGN|CONSTRAINT|UNIQUE|CHECK|INDEX)', definition, re.IGNORECASE):
-                    continue
-                
-                # Extract column name - the first word before any whitespace
-                match = re.match(r'^\s*([^\s\(]+)', definition)
-                if match:
-                    column_name = match.group(1).strip('"').strip('`')
-                    all_column_names.append(column_name)
-            
-            # Second pass: process columns and constraints
-            for definition in column_definitions:
-                if not definition:
-                    continue
-                
-                # Log the definition for debugging
-                logging.debug(f"Processing definition: {definition}")
-                    
-                # Handle primary key constraints
-                if re.match(r'^\s*PRIMARY\s+KEY', definition, re.IGNORECASE):
-                    # Extract primary key columns
-                    pk_pattern = r'PRIMARY\s+KEY\s*\(([^)]+)\)'
-                    pk_match = re.search(pk_pattern, definition, re.IGNORECASE)
-                    if pk_match:
-                        pk_columns = [col.strip().strip('"').strip('`') for col in pk_match.group(1).split(',')]
-                        # Add primary key columns to primary keys list
-                        primary_keys.extend(pk_columns)
-                        logging.info(f"Found PRIMARY KEY: {pk_columns}")
-                    continue
-                
-                # Handle standalone UNIQUE constraints (not attached to a column)
-                if re.match(r'^\s*UNIQUE', definition, re.IGNORECASE):
-                    # Extract unique key columns
-                    unique_pattern = r'UNIQUE\s*\(([^)]+)\)'
-                    unique_match = re.search(unique_pattern, definition, re.IGNORECASE)
-                    if unique_match:
-                        key_columns = [col.strip().strip('"').strip('`') for col in unique_match.group(1).split(',')]
-                        unique_keys.extend(key_columns)
-                        logging.info(f"Found standalone UNIQUE constraint: {key_columns}")
-                    continue
-                    
-                # Handle unique constraints with CONSTRAINT keyword
-                if re.match(r'^\s*CONSTRAINT', definition, re.IGNORECASE) and 'UNIQUE' in definition.upper():
-                    # Extract unique key columns
-                    unique_key_pattern = r'CONSTRAINT\s+\w+\s+UNIQUE\s+(?:KEY\s+)?\(([^)]+)\)'
-                    unique_match = re.search(unique_key_pattern, definition, re.IGNORECASE)
-                    if unique_match:
-                        key_columns = [col.strip().strip('"').strip('`') for col in unique_match.group(1).split(',')]
-                        unique_keys.extend(key_columns)
-                        logging.info(f"Found CONSTRAINT UNIQUE: {key_columns}")
-                    continue
-                
-                # Skip other constraints
-                if re.match(r'^\s*CONSTRAINT|CHECK|INDEX|FOREIGN', definition, re.IGNORECASE):
-                    continue
-                    
-                # Skip default timestamp values or other non-column entries
-                if 'CAST(CURRENT_TIMESTAMP' in definition.upper() or not definition.strip():
-                    continue
-                
-                # Extract column name and rest of definition
-                # The column name is the first word before any whitespace
-                match = re.match(r'^\s*([^\s\(]+)(.*)', definition)
-                if match:
-                    column_name = match.group(1).strip('"').strip('`')
-                    full_definition = match.group(2).strip()
-                    
-                    # Check if this column has a UNIQUE constraint
-                    if ' UNIQUE' in full_definition.upper():
-                        unique_keys.append(column_name)
-                        logging.info(f"Found column with UNIQUE constraint: {column_name}")
-                        # Remove the UNIQUE keyword from the definition to avoid confusion
-                        full_definition = full_definition.replace(' UNIQUE', '').replace(' unique', '')
-                    
-                    # Add to columns list
-                    columns.append((column_name, full_definition))
+            # Column name with the rest of its definition (type, default, constraints)
+            columns = [(column.name, column.definition) for column in table.columns]
             
-            # Look for unique index definitions outside the CREATE TABLE statement
-            unique_index_pattern = r'CREATE\s+UNIQUE\s+INDEX\s+\w+\s+ON\s+\w+\s*\(([^)]+)\)'
-            for unique_index_match in re.finditer(unique_index_pattern, ddl_content, re.IGNORECASE):
-                index_columns = [col.strip().strip('"').strip('`') for col in unique_index_match.group(1).split(',')]
-                unique_keys.extend(index_columns)
-                logging.info(f"Found UNIQUE INDEX: {index_columns}")
+            logging.info(f"Parsed DDL file: Found {len(columns)} columns, {len(table.unique_keys)} unique keys, and {len(table.primary_keys)} primary keys")
+            logging.info(f"Unique keys: {list(table.unique_keys)}")
+            logging.info(f"Primary keys: {list(table.primary_keys)}")
             
-            # Remove duplicates from unique keys and primary keys
-            unique_keys = list(dict.fromkeys(unique_keys))
-            primary_keys = list(dict.fromkeys(primary_keys))
-            
-            # Verify that all keys are valid column names
-            valid_unique_keys = [key for key in unique_keys if key in all_column_names]
-            valid_primary_keys = [key for key in primary_keys if key in all_column_names]
-            
-            # Store both unique and primary keys for later use
-            self.unique_keys = valid_unique_keys
-            self.primary_keys = valid_primary_keys
-            
-            logging.info(f"Parsed DDL file: Found {len(columns)} columns, {len(valid_unique_keys)} unique keys, and {len(valid_primary_keys)} primary keys")
-            logging.info(f"Unique keys: {valid_unique_keys}")
-            logging.info(f"Primary keys: {valid_primary_keys}")
-            
-            return columns, valid_unique_keys
+            return columns, list(table.unique_keys)
 
         except Exception as e:
             logging.error(f"Error parsing DDL file: {str(e)}")
@@ -1618,45 +1532,25 @@ class DAGGeneratorApp:
         comment = openpyxl.comments.Comment('For incremental models, specify comma-separated column names to use as unique keys', 'System')
         unique_key_cell.comment = comment
         
-        # Add MINUS_LOGIC_REQUIRED row
-        minus_logic_label = mapping_sheet.cell(row=8, column=1, value='MINUS_LOGIC_REQUIRED')
-        minus_logic_label.fill = openpyxl.styles.PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
-        minus_logic_cell = mapping_sheet.cell(row=8, column=2)
-        # Add data validation for Y/N
-        minus_logic_dv = openpyxl.worksheet.datavalidation.DataValidation(
-            type="list",
-            formula1='"Y,N"',
-            allow_blank=True
+        # Add Y/N options
+        self.add_yes_no_option(
+            mapping_sheet, 8, 'MINUS_LOGIC_REQUIRED',
+            'Set to Y to exclude audit columns and unique key combination in the minus logic'
         )
-        mapping_sheet.add_data_validation(minus_logic_dv)
-        minus_logic_dv.add(minus_logic_cell)
-        # Default to N
-        minus_logic_cell.value = "N"
-        # Add a comment to explain the format
-        minus_comment = openpyxl.comments.Comment('Set to Y to exclude audit columns and unique key combination in the minus logic', 'System')
-        minus_logic_cell.comment = minus_comment
-        transient_cell_label = mapping_sheet.cell(row=9, column=1, value='TRANSIENT_TABLE')
-        transient_cell_label.fill = openpyxl.styles.PatternFill(start_color="FFFF00", end_color="FFFF00",fill_type="solid")
-        transient_cell = mapping_sheet.cell(row=9, column=2)
-        # Add data validation for Y/N
-        transient_cell_dv = openpyxl.worksheet.datavalidation.DataValidation(
-            type="list",
-            formula1='"Y,N"',
-            allow_blank=True
+        self.add_yes_no_option(
+            mapping_sheet, 9, 'TRANSIENT_TABLE',
+            'Set to Y to set true tag for transient model property'
+        )
+        self.add_yes_no_option(
+            mapping_sheet, 10, 'PROFILE_UNIQUE_KEY',
+            'Set to Y to profile the source table in Snowflake when no unique key is given in the DDL or mapping'
         )
-        mapping_sheet.add_data_validation(transient_cell_dv)
-        transient_cell_dv.add(transient_cell)
-        # Default to N
-        transient_cell.value = "N"
-        # Add a comment to explain the format
-        transient_comment = openpyxl.comments.Comment('Set to Y to set true tag for transient model property', 'System')
-        transient_cell.comment = transient_comment
         # Add blank row before column mappings
         mapping_sheet.append([])
 
-        # Add column headers (start from row 10 now to account for the MINUS_LOGIC_REQUIRED row)
+        # Add column headers (start from row 12 to leave a blank row after the options)
         headers = ['S.NO', 'TargetColumn', 'Source Table', 'Logic/Mapping/Constant Value']  # Removed Source Type and Source Name
-        header_row = 11
+        header_row = 12
         for col, header in enumerate(headers, start=1):
             cell = mapping_sheet.cell(row=header_row, column=col, value=header)
             cell.font = openpyxl.styles.Font(bold=True, color='FFFFFF')
@@ -1759,6 +1653,24 @@ class DAGGeneratorApp:
         for col, width in column_widths.items():
             mapping_sheet.column_dimensions[col].width = width
 
+    def add_yes_no_option(self, mapping_sheet, row, param, description):
+        """Add a Y/N header option defaulting to N"""
+        label = mapping_sheet.cell(row=row, column=1, value=param)
+        label.fill = openpyxl.styles.PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
+        value_cell = mapping_sheet.cell(row=row, column=2)
+        # Add data validation for Y/N
+        dv = openpyxl.worksheet.datavalidation.DataValidation(
+            type="list",
+            formula1='"Y,N"',
+            allow_blank=True
+        )
+        mapping_sheet.add_data_validation(dv)
+        dv.add(value_cell)
+        # Default to N
+        value_cell.value = "N"
+        # Add a comment to explain the format
+        value_cell.comment = openpyxl.comments.Comment(description, 'System')
+
     def update_config_sheet(self, config_sheet):
         """Create and update the Config sheet"""
         # Add header
@@ -1879,6 +1791,27 @@ class DAGGeneratorApp:
                 'param': 'AUTHENTICATOR',
                 'value': 'externalbrowser',
                 'description': 'Authentication method'
+            },
+            {
+                'param': 'METADATA_BACKEND',
+                'value': 'SNOWFLAKE',
+                'options': ['SNOWFLAKE', 'SQLITE', 'SNAPSHOT'],
+                'description': 'Where column metadata is read from (SQLITE: local catalog, SNAPSHOT: shared snapshot file)'
+            },
+            {
+                'param': 'METADATA_PATH',
+                'value': '',
+                'description': 'Catalog file for SQLITE (default: data/metadata_catalog.db) or snapshot file for SNAPSHOT'
+            },
+            {
+                'param': 'METADATA_MAX_CONCURRENCY',
+                'value': 4,
+                'description': 'Maximum number of metadata queries run in parallel'
+            },
+            {
+                'param': 'METADATA_QUERY_TIMEOUT',
+                'value': 120,
+                'description': 'Timeout in seconds for each metadata query'
             }
         ]
 
@@ -1893,6 +1826,16 @@ class DAGGeneratorApp:
             
             # Description
             desc_cell = config_sheet.cell(row=current_row, column=3, value=config['description'])
+
+            # Add a dropdown for options with a fixed set of values
+            if 'options' in config:
+                dv = openpyxl.worksheet.datavalidation.DataValidation(
+                    type="list",
+                    formula1=f'"{",".join(config["options"])}"',
+                    allow_blank=True
+                )
+                config_sheet.add_data_validation(dv)
+                dv.add(value_cell)
             
             current_row += 1
 
@@ -1920,31 +1863,7 @@ class DAGGeneratorApp:
     def extract_table_name(self, ddl_path):
         """Extract table name from DDL file"""
         try:
-            with open(ddl_path, 'r') as file:
-                ddl_content = file.read()
-            
-            # Find the table name in CREATE TABLE statement
-            # This pattern will handle:
-            # - IF NOT EXISTS clause
-            # - Schema prefix
-            # - Quoted and unquoted identifiers
-            table_pattern = r'CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(?:\"?(\w+)\"?\.)?"?(\w+)"?'
-            match = re.search(table_pattern, ddl_content, re.IGNORECASE)
-            
-            if match:
-                # Get schema and table name
-                schema = match.group(1) or ''  # First group (schema) - optional
-                table = match.group(2)         # Second group (table name)
-                
-                # Remove any quotes and trim
-                schema = schema.strip('"').strip('`').strip()
-                table = table.strip('"').strip('`').strip()
-                
-                # Combine schema and table if schema exists
-                full_table_name = f"{schema}.{table}" if schema else table
-                return full_table_name.upper()  # Convert to uppercase
-            
-            return "Unknown_Table"
+            return extract_table_name(ddl_path)
         except Exception:
             return "Unknown_Table"
 
@@ -2068,9 +1987,6 @@ class DAGGeneratorApp:
             # Parse DDL file to extract columns
             columns, unique_keys = self.parse_ddl_file(self.ddl_file_path.get())
 
-            # Store unique keys for later use
-            self.unique_keys = unique_keys
-
             # Update the mapping sheet with columns
             self.update_mapping_sheet((columns, unique_keys))
 
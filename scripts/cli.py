@@ -0,0 +1,188 @@
+"""
+Command line entry point for the DBT Model Generator.
+
+Runs the metadata dependent generators without the GUI, e.g.:
+
+    python -m scripts.cli fill-mapping mappings/D_OPCO_DDL_mapping.xlsx --metadata-backend sqlite
+    python -m scripts.cli load-catalog columns.csv --metadata-path data/metadata_catalog.db
+    python -m scripts.cli export-snapshot EBI_DEV_DB --schema EDW --mapping mappings/D_OPCO_DDL_mapping.xlsx
+"""
+import argparse
+import csv
+import sys
+from collections import OrderedDict
+
+from openpyxl import load_workbook
+
+from scripts.model_mapper import ModelMapper
+from scripts.generate_lnd_dbt_model_file import generate_lnd_dbt_model_file, create_dp_view_file
+from scripts.utils.artifact_writer import artifact_stats
+from scripts.utils.excel_utils import get_config_from_sheet
+from scripts.utils.metadata_providers import (
+    DEFAULT_CATALOG_PATH,
+    DEFAULT_METADATA_BACKEND,
+    SNOWFLAKE_CONNECTION_SETTINGS,
+    SQLiteMetadataProvider,
+    export_snapshot,
+    get_metadata_provider,
+    import_snapshot
+)
+from scripts.utils.snowflake_instrumentation import instrumentation
+
+
+def add_metadata_arguments(parser):
+    """Add the options that override the Config sheet metadata backend"""
+    parser.add_argument(
+        '--metadata-backend',
+        choices=['snowflake', 'sqlite', 'snapshot'],
+        help='Metadata backend to use instead of METADATA_BACKEND from the Config sheet'
+    )
+    parser.add_argument(
+        '--metadata-path',
+        help='Catalog file for file based backends instead of METADATA_PATH from the Config sheet'
+    )
+
+
+def fill_mapping(args):
+    """Fill the column details of one or more mapping files"""
+    results = ModelMapper().generate_model_mappings(
+        args.mapping_files,
+        metadata_backend=args.metadata_backend,
+        metadata_path=args.metadata_path
+    )
+    for mapping_file, (mapped_count, total_count) in zip(args.mapping_files, results):
+        print(f"{mapping_file}: mapped {mapped_count} out of {total_count} columns")
+
+
+def generate_lnd(args):
+    """Generate the LND model file for a mapping"""
+    _, file_path = generate_lnd_dbt_model_file(
+        args.config_file,
+        args.mapping_file,
+        metadata_backend=args.metadata_backend,
+        metadata_path=args.metadata_path
+    )
+    print(f"LND Model file: {file_path}")
+
+
+def generate_dp_view(args):
+    """Generate the data product view file for a mapping"""
+    _, file_path = create_dp_view_file(
+        args.config_file,
+        args.mapping_file,
+        metadata_backend=args.metadata_backend,
+        metadata_path=args.metadata_path
+    )
+    print(f"DP View file: {file_path}")
+
+
+def load_catalog(args):
+    """Load column metadata from a CSV file into the local SQLite catalog"""
+    # Expected headers: DATABASE, SCHEMA, TABLE, COLUMN_NAME and optionally DATA_TYPE
+    tables = OrderedDict()
+    with open(args.csv_file, newline='') as f:
+        for row in csv.DictReader(f):
+            key = (row['DATABASE'], row['SCHEMA'], row['TABLE'])
+            tables.setdefault(key, []).append((row['COLUMN_NAME'], row.get('DATA_TYPE')))
+
+    with SQLiteMetadataProvider(args.metadata_path or DEFAULT_CATALOG_PATH) as provider:
+        for (database, schema, table), columns in tables.items():
+            provider.add_table(database, schema, table, columns)
+
+    print(f"Loaded {len(tables)} tables into {args.metadata_path or DEFAULT_CATALOG_PATH}")
+
+
+def export_schema_snapshot(args):
+    """Dump the column metadata of a database or schema into a snapshot file"""
+    config = {}
+    if args.mapping:
+        # Reuse the connection settings from a mapping file's Config sheet
+        config = get_config_from_sheet(load_workbook(args.mapping, read_only=True)['Config'])
+
+    backend = (args.metadata_backend or config.get('METADATA_BACKEND') or DEFAULT_METADATA_BACKEND).strip().upper()
+    missing = [setting for setting in SNOWFLAKE_CONNECTION_SETTINGS if not config.get(setting)]
+    if backend == 'SNOWFLAKE' and missing:
+        args.parser.error(
+            f"missing Snowflake connection settings: {', '.join(missing)}. Pass --mapping with a mapping "
+            f"file whose Config sheet holds them, or --metadata-backend sqlite/snapshot to export from a catalog"
+        )
+
+    with get_metadata_provider(
+        config,
+        backend=args.metadata_backend,
+        path=args.metadata_path,
+        database=args.database,
+        generator='export_snapshot'
+    ) as provider:
+        table_count = export_snapshot(provider, args.output, args.database, args.schema)
+
+    print(f"Wrote {table_count} tables to {args.output}")
+
+
+def import_schema_snapshot(args):
+    """Load a snapshot file into the local SQLite catalog"""
+    catalog_path = args.metadata_path or DEFAULT_CATALOG_PATH
+    table_count = import_snapshot(args.snapshot_file, catalog_path)
+    print(f"Imported {table_count} tables into {catalog_path}")
+
+
+def build_parser():
+    """Build the argument parser with one sub-command per operation"""
+    parser = argparse.ArgumentParser(prog='python -m scripts.cli', description='DBT Model Generator')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    fill_parser = subparsers.add_parser('fill-mapping', help='Fill column details of mapping files')
+    fill_parser.add_argument('mapping_files', nargs='+', help='Mapping Excel files')
+    add_metadata_arguments(fill_parser)
+    fill_parser.set_defaults(func=fill_mapping)
+
+    lnd_parser = subparsers.add_parser('generate-lnd', help='Generate an LND model file')
+    lnd_parser.add_argument('config_file', help='Model configuration JSON file')
+    lnd_parser.add_argument('mapping_file', help='Mapping Excel file')
+    add_metadata_arguments(lnd_parser)
+    lnd_parser.set_defaults(func=generate_lnd)
+
+    dp_parser = subparsers.add_parser('generate-dp-view', help='Generate a data product view file')
+    dp_parser.add_argument('config_file', help='Model configuration JSON file')
+    dp_parser.add_argument('mapping_file', help='Mapping Excel file')
+    add_metadata_arguments(dp_parser)
+    dp_parser.set_defaults(func=generate_dp_view)
+
+    catalog_parser = subparsers.add_parser('load-catalog', help='Load a CSV column export into the SQLite catalog')
+    catalog_parser.add_argument('csv_file', help='CSV with DATABASE, SCHEMA, TABLE, COLUMN_NAME, DATA_TYPE columns')
+    catalog_parser.add_argument('--metadata-path', help=f'Catalog file (default: {DEFAULT_CATALOG_PATH})')
+    catalog_parser.set_defaults(func=load_catalog)
+
+    export_parser = subparsers.add_parser('export-snapshot', help='Dump database/schema column metadata to a snapshot file')
+    export_parser.add_argument('database', help='Database to export')
+    export_parser.add_argument('--schema', help='Only export this schema')
+    export_parser.add_argument('--mapping', help='Mapping Excel file whose Config sheet holds the Snowflake settings')
+    export_parser.add_argument('--output', default='data/schema_snapshot.json.gz', help='Snapshot file to write')
+    add_metadata_arguments(export_parser)
+    export_parser.set_defaults(func=export_schema_snapshot, parser=export_parser)
+
+    import_parser = subparsers.add_parser('import-snapshot', help='Load a snapshot file into the SQLite catalog')
+    import_parser.add_argument('snapshot_file', help='Snapshot file written by export-snapshot')
+    import_parser.add_argument('--metadata-path', help=f'Catalog file (default: {DEFAULT_CATALOG_PATH})')
+    import_parser.set_defaults(func=import_schema_snapshot)
+
+    return parser
+
+
+def main(argv=None):
+    """Main entry point"""
+    args = build_parser().parse_args(argv)
+    try:
+        args.func(args)
+    except Exception as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 1
+    finally:
+        for summary in (instrumentation.format_summary(), artifact_stats.format_summary()):
+            if summary:
+                print(summary)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
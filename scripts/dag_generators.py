@@ -1,6 +1,8 @@
 import json
 import os
 
+from scripts.utils.artifact_writer import write_if_changed
+
 def create_dataset_dependency_dag(config_file, output_path):
     """Create a dataset dependency DAG file"""
     try:
@@ -47,8 +49,7 @@ with dag:
 
         # Write the DAG file
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        with open(output_path, 'w') as f:
-            f.write(dag_content)
+        write_if_changed(output_path, dag_content)
 
     except Exception as e:
         raise Exception(f"Failed to create dataset dependency DAG: {str(e)}") 
\ No newline at end of file
@@ -1,6 +1,9 @@
 import json
 import os
 
+from scripts.utils.artifact_writer import write_if_changed
+from scripts.utils.templates import render_template
+
 def create_cron_dag(json_path, dag_output_path):
     try:
         config = load_json_config(json_path)
@@ -34,27 +37,15 @@ def load_json_config(json_path):
 
 def generate_dag_code(SCHEMA_NAME, MODEL_TYPE, MODEL_NAME, DBT_JOB_NAME, cron_values):
     """Generate the DAG code based on the provided parameters."""
-    return f"""
-from airflow import Dataset
-from common.classes.dag_utility import DAG_Helper, workspace_name, workspace_env
-
-SCHEMA_NAME, MODEL_TYPE, MODEL_NAME = '{SCHEMA_NAME}', '{MODEL_TYPE}', '{MODEL_NAME}'
-DBT_JOB_NAME = SCHEMA_NAME + '_' + MODEL_NAME
-
-dag_helper = DAG_Helper()
-dag = dag_helper.generate_DAG(SCHEMA_NAME, MODEL_TYPE, MODEL_NAME, schedule='{cron_values}')
-
-with dag:
-    dbt_airflow_task = dag_helper.generate_dbt_python_task(DBT_JOB_NAME)
-"""
+    return render_template('dag.CRON', schema_name=SCHEMA_NAME, model_type=MODEL_TYPE,
+                           model_name=MODEL_NAME, schedule=cron_values)
 
 
 def save_dag_code(dag_output_path, dag_code, SCHEMA_NAME, MODEL_NAME):
     """Ensure the directory exists and save the DAG code to a Python file."""
     os.makedirs(os.path.dirname(dag_output_path), exist_ok=True)
     dag_output_path = os.path.join(os.path.dirname(dag_output_path), f"{SCHEMA_NAME}_{MODEL_NAME}.py")
-    with open(dag_output_path, 'w') as dag_file:
-        dag_file.write(dag_code)
+    write_if_changed(dag_output_path, dag_code)
 
 
 def determine_model_type(model_name, default_schema):
@@ -2,6 +2,9 @@ import json
 import os
 import logging
 
+from scripts.utils.artifact_writer import write_if_changed
+from scripts.utils.templates import render_template
+
 
 def create_sns_dag(json_path, dag_output_path):
     try:
@@ -40,26 +43,14 @@ def load_json_config(json_path):
 
 def generate_dag_code(SCHEMA_NAME, MODEL_TYPE, MODEL_NAME, DBT_JOB_NAME, DOMAIN_NAME, DP_NAME):
     """Generate the DAG code based on the provided parameters."""
-    return f"""
-from common.classes.dag_utility import DAG_Helper
- 
-DOMAIN_NAME, MODEL_TYPE, DP_NAME = '{DOMAIN_NAME}', 'SNS_DPND', '{MODEL_NAME}'
-DBT_JOB_NAME = DOMAIN_NAME + '_' + DP_NAME
- 
-dag_helper = DAG_Helper()
-dag = dag_helper.generate_DAG(MODEL_TYPE + '_' + DOMAIN_NAME, MODEL_TYPE, DP_NAME, schedule=None)
- 
-with dag:
-    dbt_airflow_task = dag_helper.generate_dbt_python_task(DBT_JOB_NAME)
-"""
+    return render_template('dag.SNS', domain_name=DOMAIN_NAME, model_name=MODEL_NAME)
 
 
 def save_dag_code(dag_output_path, dag_code, SCHEMA_NAME, MODEL_NAME):
     """Ensure the directory exists and save the DAG code to a Python file."""
     os.makedirs(os.path.dirname(dag_output_path), exist_ok=True)
     dag_output_path = os.path.join(os.path.dirname(dag_output_path), f"{SCHEMA_NAME}_{MODEL_NAME}.py")
-    with open(dag_output_path, 'w') as dag_file:
-        dag_file.write(dag_code)
+    write_if_changed(dag_output_path, dag_code)
 
 
 def determine_model_type(model_name, default_schema):
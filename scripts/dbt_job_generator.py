@@ -2,6 +2,8 @@ import os
 import yaml
 import json
 
+from scripts.utils.artifact_writer import write_if_changed
+
 def create_dbt_job_file(config_file,model_dbt_job_additon_flg=False ,output_dir='jobs', merge_dbt_job_additon_flg=False, merge_macro_file_path=None, insert_dbt_job_additon_flg=False, insert_macro_file_path=None):
     """Create a dbt job file from the configuration"""
     try:
@@ -33,8 +35,7 @@ def create_dbt_job_file(config_file,model_dbt_job_additon_flg=False ,output_dir=
         # Create the job file with SCHEMA_MODEL.dbt format
         job_file_path = os.path.join(output_dir, f"{job_name}.dbt")
 
-        with open(job_file_path, 'w') as f:
-            f.write(job_content)
+        write_if_changed(job_file_path, job_content)
 
         return job_file_path
 
@@ -1,9 +1,20 @@
 import json
 from openpyxl import load_workbook
-import snowflake.connector
 import openpyxl.worksheet.datavalidation
 import os
 from   .model_mapper  import ModelMapper
+from scripts.model_ir import SKIPPED_TARGET_COLUMNS, copied_source_column, quote_identifier
+from scripts.utils.artifact_writer import write_if_changed
+from scripts.utils.column_model import load_model_config
+from scripts.utils.excel_utils import get_config_from_sheet, get_mapping_header_value
+from scripts.utils.metadata_providers import get_metadata_provider
+from scripts.utils.snowflake_instrumentation import instrumented_connect
+# Columns the LND model fills itself, so they never match the source
+TEST_EXCLUDED_COLUMNS = ("DATA_SRC", "CREATE_DT", "CREATE_BY", "CREATE_PGM", "UPDATE_DT", "UPDATE_BY", "UPDATE_PGM")
+DEFAULT_TEST_BUCKET_COUNT = 1024
+TEST_DIFF_ROW_LIMIT = 1000
+
+
 def format_columns(columns):
     """Format columns for the dbt model."""
     try:
@@ -28,7 +39,7 @@ def replace_audit_columns(columns, source_schema_name, source_view_name, target_
     except Exception as e:
         raise Exception(f"An error occurred while replacing audit columns: {e}")
 
-def generate_lnd_dbt_model_file(config, file_path):
+def generate_lnd_dbt_model_file(config, file_path, metadata_backend=None, metadata_path=None):
     
     """Generate the dbt model file."""
     try:
@@ -65,46 +76,19 @@ def generate_lnd_dbt_model_file(config, file_path):
         target_table_name = target_parts[-1]
 
         """Extract Snowflake configuration from Config sheet"""
-        snowflake_config = {}
-        in_snowflake_section = False
-
-        for row in range(2, config_sheet.max_row + 1):
-            param = config_sheet.cell(row=row, column=1).value
-            if not param:
-                continue
-            if param == 'Snowflake Configuration':
-                in_snowflake_section = True
-                continue
-            if in_snowflake_section and param in ['ROLE', 'WAREHOUSE', 'DATABASE', 'ACCOUNT', 'USER', 'AUTHENTICATOR']:
-                value = config_sheet.cell(row=row, column=2).value
-                if value:
-                    snowflake_config[param] = value
-
-        """Get column information from Snowflake"""
-        conn = None
-        cursor = None
-        conn = snowflake.connector.connect(
-            account=snowflake_config['ACCOUNT'],
-            user=snowflake_config['USER'],
-            authenticator=snowflake_config['AUTHENTICATOR'],
-            warehouse=snowflake_config['WAREHOUSE'],
-            role=snowflake_config['ROLE'],
-            database=source_db,
-            schema=source_schema
-        )
+        snowflake_config = get_config_from_sheet(config_sheet)
 
-        print(conn)
-
-        cursor = conn.cursor()
-        cursor.execute(f"""
-            SELECT COLUMN_NAME
-            FROM {source_db}.INFORMATION_SCHEMA.COLUMNS
-             WHERE TABLE_SCHEMA = '{source_schema}'
-            AND TABLE_NAME = '{source_table_name}'
-            ORDER BY ORDINAL_POSITION
-        """)
+        """Get column information from the metadata backend"""
+        with get_metadata_provider(
+            snowflake_config,
+            backend=metadata_backend,
+            path=metadata_path,
+            database=source_db,
+            schema=source_schema,
+            generator='generate_lnd_dbt_model_file'
+        ) as provider:
+            columns = provider.get_table_columns(source_db, source_schema, source_table_name)
 
-        columns = cursor.fetchall()
         formatted_columns = format_columns(columns)
         replaced_columns = replace_audit_columns(formatted_columns, source_schema, source_table_name, target_schema, target_table_name)
         model_config = f"""
@@ -137,8 +121,7 @@ def generate_lnd_dbt_model_file(config, file_path):
         file_path = os.path.join(output_dir, file_name)
 
         # Write model file
-        with open(file_path, 'w') as f:
-            f.write(model_config)
+        write_if_changed(file_path, model_config)
 
         return True,file_path
     except Exception as e:
@@ -156,7 +139,8 @@ def get_snowflake_connection(config):
         snowflake.connector.SnowflakeConnection: Snowflake connection object
     """
     try:
-        conn = snowflake.connector.connect(
+        conn = instrumented_connect(
+            'generate_lnd_dbt_model_file',
             account=config['account'],
             user=config['user'],
             password=config['password'],
@@ -169,7 +153,7 @@ def get_snowflake_connection(config):
     except Exception as e:
         raise Exception(f"Failed to connect to Snowflake: {str(e)}")
 
-def create_dp_view_file(config, file_path):
+def create_dp_view_file(config, file_path, metadata_backend=None, metadata_path=None):
     """Generate the dbt model file."""
     try:
         with open(config) as f:
@@ -203,54 +187,22 @@ def create_dp_view_file(config, file_path):
         target_table_name = target_parts[-1]
 
         """Extract Snowflake configuration from Config sheet"""
-        snowflake_config = {}
-        in_snowflake_section = False
-
-        for row in range(2, config_sheet.max_row + 1):
-            param = config_sheet.cell(row=row, column=1).value
-            if not param:
-                continue
-            if param == 'Snowflake Configuration':
-                in_snowflake_section = True
-                continue
-            if in_snowflake_section and param in ['ROLE', 'WAREHOUSE', 'DATABASE', 'ACCOUNT', 'USER', 'AUTHENTICATOR']:
-                value = config_sheet.cell(row=row, column=2).value
-                if value:
-                    snowflake_config[param] = value
-
-        """Get column information from Snowflake"""
-        conn = None
-        cursor = None
-        conn = snowflake.connector.connect(
-            account=snowflake_config['ACCOUNT'],
-            user=snowflake_config['USER'],
-            authenticator=snowflake_config['AUTHENTICATOR'],
-            warehouse=snowflake_config['WAREHOUSE'],
-            role=snowflake_config['ROLE'],
-            database=source_db,
-            schema=source_schema
-        )
+        snowflake_config = get_config_from_sheet(config_sheet)
 
-        print(conn)
-
-        cursor = conn.cursor()
-        cursor.execute(f"""
-               SELECT COLUMN_NAME
-               FROM {source_db}.INFORMATION_SCHEMA.COLUMNS
-                WHERE TABLE_SCHEMA = '{source_schema}'
-               AND TABLE_NAME = '{source_table_name}'
-               ORDER BY ORDINAL_POSITION
-           """)
-
-        columns = cursor.fetchall()
-        cursor.execute(f"""
-               SELECT COLUMN_NAME
-               FROM {source_db}.INFORMATION_SCHEMA.COLUMNS
-                WHERE TABLE_SCHEMA = '{target_schema}'
-               AND TABLE_NAME = '{target_table_name}'
-               ORDER BY ORDINAL_POSITION
-           """)
-        target_columns = cursor.fetchall()
+        """Get column information from the metadata backend"""
+        with get_metadata_provider(
+            snowflake_config,
+            backend=metadata_backend,
+            path=metadata_path,
+            database=source_db,
+            schema=source_schema,
+            generator='create_dp_view_file'
+        ) as provider:
+            source_key = (source_db, source_schema, source_table_name)
+            target_key = (source_db, target_schema, target_table_name)
+            columns_by_table = provider.get_columns_for_tables([source_key, target_key])
+        columns = columns_by_table[source_key]
+        target_columns = columns_by_table[target_key]
         source_formatted_columns = format_columns(columns)
         source_replaced_columns = replace_audit_columns(source_formatted_columns, source_schema, source_table_name, target_schema,
                                                  target_table_name)
@@ -276,8 +228,7 @@ def create_dp_view_file(config, file_path):
         file_path = os.path.join(output_dir, file_name)
 
         # Write model file
-        with open(file_path, 'w') as f:
-            f.write(model_config)
+        write_if_changed(file_path, model_config)
 
         return True, file_path
     except Exception as e:
@@ -323,15 +274,168 @@ def create_test_model_file(json_file, file_path,test_model_output_path):
         file_name = f"{model_name}_test.sql"
         file_path = os.path.join(output_dir, file_name)
 
+        # Compare the columns the mapping copies from the source table itself, by target name;
+        # columns of joined tables do not exist in the source table
+        column_pairs = []
+        for column in load_model_config(json_file)['Columns']:
+            target_column = str(column.target_column)
+            source_column = copied_source_column(column.logic)
+            if source_column and target_column not in SKIPPED_TARGET_COLUMNS + TEST_EXCLUDED_COLUMNS:
+                column_pairs.append((quote_identifier(source_column), quote_identifier(target_column)))
+
+        bucket_column, bucket_count, sample_percent = get_test_options(mapping_sheet)
+
         # Write test model file
-        with open(file_path, 'w') as f:
-            f.write(f"SELECT * FROM {target_schema}.{target_table_name} WHERE 1=0;")
-            f.write(f"\n\nSELECT * FROM {target_schema}.{target_table_name} EXCEPT SELECT * FROM {source_table};")
-            f.write(f"\n\nSELECT COUNT(*) FROM {target_schema}.{target_table_name} ;")
-            f.write(f"\n\nSELECT COUNT(*) FROM {source_table} WHERE 1=0 ;")
+        write_if_changed(file_path, render_checksum_test_sql(
+            f"{target_schema}.{target_table_name}",
+            source_table,
+            column_pairs,
+            bucket_column=bucket_column,
+            bucket_count=bucket_count,
+            sample_percent=sample_percent
+        ))
 
         return True, file_path
     except Exception as e:
         raise Exception(f"An error occurred while generating the dbt test model: {e}")
 
 
+def get_test_options(mapping_sheet):
+    """
+    Read TEST_BUCKET_COLUMN, TEST_BUCKET_COUNT and TEST_SAMPLE_PERCENT from a mapping sheet
+
+    Returns:
+        tuple: (bucket column or None, bucket count, sample percent or None)
+
+    Raises:
+        ValueError: If the bucket count is not a positive integer or the sample percent is not
+            a number greater than 0 and at most 100
+    """
+    bucket_column = get_mapping_header_value(mapping_sheet, 'TEST_BUCKET_COLUMN')
+    if bucket_column:
+        bucket_column = str(bucket_column).strip()
+
+    count_value = get_mapping_header_value(mapping_sheet, 'TEST_BUCKET_COUNT', DEFAULT_TEST_BUCKET_COUNT)
+    try:
+        bucket_count = int(str(count_value).strip())
+    except ValueError:
+        bucket_count = 0
+    if bucket_count < 1:
+        raise ValueError(f"TEST_BUCKET_COUNT must be a positive integer, got '{count_value}'")
+
+    percent_value = get_mapping_header_value(mapping_sheet, 'TEST_SAMPLE_PERCENT')
+    if percent_value is None or not str(percent_value).strip():
+        return bucket_column, bucket_count, None
+    try:
+        sample_percent = float(str(percent_value).strip())
+    except ValueError:
+        sample_percent = 0
+    if not 0 < sample_percent <= 100:
+        raise ValueError(f"TEST_SAMPLE_PERCENT must be a number greater than 0 and at most 100, "
+                         f"got '{percent_value}'")
+    return bucket_column, bucket_count, sample_percent
+
+
+def render_checksum_test_sql(target_table, source_table, column_pairs, bucket_column=None,
+                             bucket_count=DEFAULT_TEST_BUCKET_COUNT, sample_percent=None):
+    """
+    Render the statements validating a target table against its source
+
+    The first statement returns the buckets whose row count or HASH_AGG checksum differ, so
+    an empty result means the tables match; both sides are read once and only aggregates are
+    compared. The second lists the differing rows of those buckets only; it reads the bucket
+    list from the result of the first through RESULT_SCAN, so it must run right after it in
+    the same session.
+
+    Args:
+        target_table (str): SCHEMA.TABLE of the target
+        source_table (str): DATABASE.SCHEMA.TABLE of the source
+        column_pairs (list): (source column, target column) pairs to compare
+        bucket_column (str): Target column whose hash splits the comparison into bucket_count
+            buckets; the whole table is one bucket without it
+        bucket_count (int): Number of buckets
+        sample_percent (float): Only compare this percentage of the rows, chosen by the hash
+            of the bucket column or the first compared column so both sides keep the same rows
+
+    Returns:
+        str: The test SQL
+    """
+    source_columns = [source for source, _ in column_pairs]
+    target_columns = [target for _, target in column_pairs]
+    source_for = {target: source for source, target in column_pairs}
+
+    def bucket_expression(columns_by_target):
+        if not bucket_column:
+            return "0"
+        column = columns_by_target.get(quote_identifier(bucket_column), quote_identifier(bucket_column))
+        return f"MOD(ABS(HASH({column})), {bucket_count})"
+
+    def side_filter(columns_by_target):
+        if not sample_percent:
+            return ""
+        sample_column = quote_identifier(bucket_column) if bucket_column else (target_columns or ["1"])[0]
+        column = columns_by_target.get(sample_column, sample_column)
+        return f"\n    WHERE MOD(ABS(HASH({column}, 'sample')), 100) < {sample_percent:g}"
+
+    identity = {target: target for target in target_columns}
+    sides = (('source', source_table, source_columns, source_for), ('target', target_table, target_columns, identity))
+
+    aggregates = []
+    for name, table, columns, columns_by_target in sides:
+        checksum = f",\n        HASH_AGG({', '.join(columns)}) AS CHECKSUM" if columns else ""
+        aggregates.append(
+            f"{name}_buckets AS (\n"
+            f"    SELECT\n"
+            f"        {bucket_expression(columns_by_target)} AS BUCKET,\n"
+            f"        COUNT(*) AS ROW_COUNT{checksum}\n"
+            f"    FROM {table}{side_filter(columns_by_target)}\n"
+            f"    GROUP BY 1\n"
+            f")"
+        )
+    checksum_mismatch = "\n    OR s.CHECKSUM IS DISTINCT FROM t.CHECKSUM" if column_pairs else ""
+    mismatched_buckets = (
+        "WITH " + ",\n".join(aggregates) + ",\n"
+        "mismatched_buckets AS (\n"
+        "    SELECT\n"
+        "        COALESCE(s.BUCKET, t.BUCKET) AS BUCKET,\n"
+        "        s.ROW_COUNT AS SOURCE_ROWS,\n"
+        "        t.ROW_COUNT AS TARGET_ROWS\n"
+        "    FROM source_buckets AS s\n"
+        "    FULL OUTER JOIN target_buckets AS t ON s.BUCKET = t.BUCKET\n"
+        "    WHERE s.ROW_COUNT IS DISTINCT FROM t.ROW_COUNT" + checksum_mismatch + "\n"
+        ")"
+    )
+
+    statements = [
+        f"SELECT * FROM {target_table} WHERE 1=0;",
+        "-- Buckets whose row count or checksum differ; no rows means the tables match\n"
+        f"{mismatched_buckets}\nSELECT * FROM mismatched_buckets ORDER BY BUCKET;"
+    ]
+    if column_pairs:
+        differing_rows = []
+        for name, table, columns, columns_by_target in sides:
+            select_list = ",\n        ".join(
+                f"{column} AS {target}" if column != target else column
+                for column, target in zip(columns, target_columns)
+            )
+            where = side_filter(columns_by_target).replace("\n    WHERE ", "\n    AND ")
+            differing_rows.append(
+                f"{name}_rows AS (\n"
+                f"    SELECT\n"
+                f"        {select_list}\n"
+                f"    FROM {table}\n"
+                f"    WHERE {bucket_expression(columns_by_target)} IN (SELECT BUCKET FROM mismatched_buckets){where}\n"
+                f")"
+            )
+        statements.append(
+            "-- Rows that differ, read from the mismatching buckets only; run right after the previous\n"
+            "-- statement, whose result lists those buckets\n"
+            "WITH mismatched_buckets AS (\n"
+            "    SELECT BUCKET FROM TABLE(RESULT_SCAN(LAST_QUERY_ID()))\n"
+            "),\n" + ",\n".join(differing_rows) + "\n"
+            "SELECT 'MISSING_IN_TARGET' AS DIFF, * FROM (SELECT * FROM source_rows EXCEPT SELECT * FROM target_rows)\n"
+            "UNION ALL\n"
+            "SELECT 'UNEXPECTED_IN_TARGET' AS DIFF, * FROM (SELECT * FROM target_rows EXCEPT SELECT * FROM source_rows)\n"
+            f"LIMIT {TEST_DIFF_ROW_LIMIT};"
+        )
+    return "\n\n".join(statements)
@@ -1,207 +1,73 @@
-import json
 import os
-import sqlparse
-
-from scripts.utils import parse_ddl_file
-
-def extract_join_clauses(mapping_sheet, main_table_alias='source'):
-    """Extract join clauses from mapping sheet"""
-    join_clauses = []
-    join_aliases = []
-    # Find the JOIN_TABLES section
-    join_section_row = None
-    for row in range(1, mapping_sheet.max_row + 1):
-        if mapping_sheet.cell(row=row, column=1).value == 'JOIN_TABLES':
-            join_section_row = row
-            break
-
-    if not join_section_row:
-        return []
-
-    # Join table headers are in the next row
-    join_header_row = join_section_row + 1
-
-    # Process join tables (starting from the row after headers)
-    for row in range(join_header_row + 1, mapping_sheet.max_row + 1):
-        join_type = mapping_sheet.cell(row=row, column=1).value
-        table_type = mapping_sheet.cell(row=row, column=2).value
-        source_name = mapping_sheet.cell(row=row, column=3).value
-        table_name = mapping_sheet.cell(row=row, column=4).value
-        alias = mapping_sheet.cell(row=row, column=5).value
-        join_condition = mapping_sheet.cell(row=row, column=6).value
-
-        # Stop when we reach an empty row or a new section
-        if not join_type or not table_name:
-            next_row = row + 1
-            if next_row <= mapping_sheet.max_row:
-                next_value = mapping_sheet.cell(row=next_row, column=1).value
-                if next_value and next_value in ['WHERE_CONDITIONS', 'GROUP BY']:
-                    break
-            continue
-
-        # Build the join clause
-        join_clause = f"{join_type} JOIN "
-
-        # Add the table reference based on type
-        if table_type and table_type.lower() == 'source' and source_name:
-            join_clause += f"{{{{ source('{source_name}', '{table_name}') }}}}"
-        else:
-            join_clause += f"{{{{ ref('{table_name}') }}}}"
-
-        # Add alias if provided
-        if alias:
-            join_clause += f" AS {alias}"
-
-        # Add join condition
-        if join_condition:
-            # Replace table aliases if needed
-            join_condition = join_condition.replace("main.", f"{main_table_alias}.")
-
-            # Add source alias to column references if not already present
-            # This regex finds column names that don't have a table prefix
-            import re
-            column_pattern = r'(?<![a-zA-Z0-9_\.])([a-zA-Z0-9_]+)(?=\s*=)'
-
-            def add_source_alias(match):
-                col = match.group(1)
-                # Skip adding alias to literals or functions
-                if col.upper() in ['AND', 'OR', 'ON', 'NULL']:
-                    return col
-                return f"{main_table_alias}.{col}"
-
-            join_condition = re.sub(column_pattern, add_source_alias, join_condition)
-            join_clause += f" ON {join_condition}"
-
-        join_clauses.append(join_clause)
-        join_aliases = set()
-        for row in range(join_header_row + 1, mapping_sheet.max_row + 1):
-            alias = mapping_sheet.cell(row=row, column=5).value
-            if alias:
-                join_aliases.add(alias)
-
-    return join_clauses, join_aliases
-
-
-def extract_where_condition(mapping_sheet, main_table_alias='source'):
-    """Extract WHERE condition from mapping sheet"""
-    # Find the WHERE_CONDITIONS section
-    where_section_row = None
-    for row in range(1, mapping_sheet.max_row + 1):
-        if mapping_sheet.cell(row=row, column=1).value == 'WHERE_CONDITIONS':
-            where_section_row = row
-            break
-
-    if not where_section_row:
-        return None
-
-    # Get the condition from the merged cell
-    where_condition = mapping_sheet.cell(row=where_section_row, column=2).value
-
-    if where_condition:
-        # Replace table aliases if needed
-        where_condition = where_condition.replace("main.", f"{main_table_alias}.")
-        return where_condition
-
-    return None
-
-
-def extract_group_by(mapping_sheet, main_table_alias='source'):
-    """Extract GROUP BY clause from mapping sheet"""
-    # Find the GROUP BY section
-    group_by_row = None
-    for row in range(1, mapping_sheet.max_row + 1):
-        if mapping_sheet.cell(row=row, column=1).value == 'GROUP BY':
-            group_by_row = row
-            break
-
-    if not group_by_row:
-        return None
-
-    # Get the group by columns from the merged cell
-    group_by = mapping_sheet.cell(row=group_by_row, column=2).value
-
-    if group_by:
-        # Replace table aliases if needed
-        group_by = group_by.replace("main.", f"{main_table_alias}.")
-        return group_by
-
-    return None
-
-def insert_sql_generator(config_file,mapping_sheet=None,target_ddl_path=None):
-    """Generate an INSERT SQL statement from JSON configuration"""
-
-    with open(config_file) as f:
-        config = json.load(f)
-
-    # Extract source information
-    source_schema = config['Source']['Schema']
-    source_table = config['Source']['Table Name']
-    source_name = config['Source']['Name']
 
-    # Extract target information
-    target_schema = config['Target']['Schema']
-    target_table = config['Target']['Table Name']
-    main_table_alias = 'source_table'
+from scripts.model_ir import load_model_ir, quote_identifier
+from scripts.utils.artifact_writer import write_if_changed
+from scripts.utils.sql_formatter import format_list, format_select, format_sql
+from scripts.utils.templates import render_template
+
+
+def render_insert_sql(model_ir):
+    """
+    Render the INSERT macro of a model
+
+    Returns:
+        tuple: (macro name, macro SQL)
+    """
+    # Extract source and target information
+    source_schema = model_ir.source_schema
+    source_table = model_ir.source_table
+    target_schema = model_ir.target_schema
+    target_table = model_ir.target_table
+    main_table_alias = model_ir.main_table_alias
 
     # Generate file name
-    macro_name = f"MAC_{config['Target']['Schema']}_{config['Target']['Table Name']}_INSERT"
-
-    # Get target DDL columns if path provided
-    target_columns = []
-    if target_ddl_path:
-        target_columns, _ = parse_ddl_file(target_ddl_path)
-        # Convert target_columns to dict for easier lookup
-        target_columns_dict = {col[0]: idx for idx, col in enumerate(target_columns)}
-
-    # Build the INSERT clause
-    insert_columns = []
-    insert_values = []
-
-    for column in config['Columns']:
-        target_col = column['Target Column']
-        logic = str(column['Logic'])
-
-        # Skip unwanted columns
-        if target_col in ["List (Y,N)", "Table Type", "ref"]:
-            continue
-
-        insert_columns.append(target_col)
-        insert_values.append(logic)
-
-    insert_columns_str = ", ".join(insert_columns)
-    insert_values_str = ", ".join(insert_values)
-    model_content = '{% macro'
-    model_content+=f" {macro_name}()"
-    model_content+='%}\n'
-    model_content+="    {% set query %}"
+    macro_name = f"MAC_{target_schema}_{target_table}_INSERT"
+
+    # Build the INSERT clause in target DDL order; the hash column is written from the computed
+    # hash, as in the MERGE
+    columns = [column for column in model_ir.columns if column.target_column != model_ir.merge_hash_column]
+    insert_columns = [quote_identifier(column.target_column) for column in columns]
+    insert_values = [str(column.logic) for column in columns]
+    if model_ir.persisted_hash:
+        quoted_hash, hash_logic = model_ir.persisted_hash
+        insert_columns.append(quoted_hash)
+        insert_values.append(hash_logic)
+
+    # Select from the source with the JOIN clauses, WHERE and GROUP BY from the mapping sheet,
+    # limited to the current batch for batched macros
+    select_query = format_select(
+        insert_values,
+        f"{source_schema}.{source_table} AS {main_table_alias}",
+        model_ir.clauses_with(model_ir.batch_condition)
+    )
+
     # Construct the INSERT SQL statement
-    model_content += f"""
-    INSERT INTO {target_schema}.{target_table} ({insert_columns_str})
-    SELECT {insert_values_str}
-    FROM {source_schema}.{source_table} as {main_table_alias}
-"""
-
-    # Add JOIN clauses if mapping_sheet is provided and contains joins
-    if mapping_sheet:
-        join_clauses, join_aliases = extract_join_clauses(mapping_sheet, main_table_alias)
-        if join_clauses:
-            model_content += "\n\t" + "\n\t".join(join_clauses)
-
-        # Add WHERE clause if provided
-    where_condition = extract_where_condition(mapping_sheet, main_table_alias)
-    if where_condition:
-        model_content += f"\n\tWHERE {where_condition}"
-
-    # Add GROUP BY clause if provided
-    group_by = extract_group_by(mapping_sheet, main_table_alias)
-    if group_by:
-        model_content += f"\n\tGROUP BY {group_by}"
-
-    model_content+=";\n"
-
-    model_content += "    {% endset %}\n"
-    model_content += "    {% set results = run_query(query) %}  \n"
-    model_content+="{% endmacro %}"
+    statement = render_template(
+        'insert_statement',
+        target_name=f"{target_schema}.{target_table}",
+        insert_columns=format_list(insert_columns),
+        select_query=select_query
+    )
+
+    statement = format_sql(statement, model_ir.sql_formatter)
+    if model_ir.batch_column:
+        return macro_name, render_template(
+            'batched_macro',
+            macro_name=macro_name,
+            bounds_query=model_ir.batch_bounds_query,
+            batch_size=model_ir.batch_size,
+            statement=statement
+        )
+    return macro_name, render_template('insert_macro', macro_name=macro_name, statement=statement)
+
+
+def insert_sql_generator(config_file, mapping_sheet=None, target_ddl_path=None, model_ir=None):
+    """Generate an INSERT SQL statement from JSON configuration, or from an already built model IR"""
+    if model_ir is None:
+        model_ir = load_model_ir(config_file, mapping_sheet, target_ddl_path)
+
+    macro_name, insert_sql = render_insert_sql(model_ir)
+
     # Create output directory if it doesn't exist
     output_dir = 'macros'
     os.makedirs(output_dir, exist_ok=True)
@@ -210,13 +76,7 @@ def insert_sql_generator(config_file,mapping_sheet=None,target_ddl_path=None):
     file_name = f"{macro_name}.sql"
     file_path = os.path.join(output_dir, file_name)
 
-    # Format the SQL statement using sqlparse
-    formatted_insert_sql = sqlparse.format(
-        model_content
-    )
-
     # Write model file
-    with open(file_path, 'w') as f:
-        f.write(formatted_insert_sql)
+    write_if_changed(file_path, insert_sql)
 
-    return True,file_path
\ No newline at end of file
+    return True,file_path
@@ -1,248 +1,111 @@
-import json
 import os
-import sqlparse
 
-from scripts.utils import parse_ddl_file
+from scripts.model_ir import hash_expression, is_sequence_logic, load_model_ir, quote_identifier
+from scripts.utils.artifact_writer import write_if_changed
+from scripts.utils.sql_formatter import INDENT, format_list, format_select, format_sql
+from scripts.utils.templates import render_template
 
 
-def extract_join_clauses(mapping_sheet, main_table_alias='source'):
-    """Extract join clauses from mapping sheet"""
-    join_clauses = []
-    join_aliases = []
-    # Find the JOIN_TABLES section
-    join_section_row = None
-    for row in range(1, mapping_sheet.max_row + 1):
-        if mapping_sheet.cell(row=row, column=1).value == 'JOIN_TABLES':
-            join_section_row = row
-            break
-
-    if not join_section_row:
-        return []
-
-    # Join table headers are in the next row
-    join_header_row = join_section_row + 1
-
-    # Process join tables (starting from the row after headers)
-    for row in range(join_header_row + 1, mapping_sheet.max_row + 1):
-        join_type = mapping_sheet.cell(row=row, column=1).value
-        table_type = mapping_sheet.cell(row=row, column=2).value
-        source_name = mapping_sheet.cell(row=row, column=3).value
-        table_name = mapping_sheet.cell(row=row, column=4).value
-        alias = mapping_sheet.cell(row=row, column=5).value
-        join_condition = mapping_sheet.cell(row=row, column=6).value
-
-        # Stop when we reach an empty row or a new section
-        if not join_type or not table_name:
-            next_row = row + 1
-            if next_row <= mapping_sheet.max_row:
-                next_value = mapping_sheet.cell(row=next_row, column=1).value
-                if next_value and next_value in ['WHERE_CONDITIONS', 'GROUP BY']:
-                    break
-            continue
-
-        # Build the join clause
-        join_clause = f"{join_type} JOIN "
-
-        # Add the table reference based on type
-        if table_type and table_type.lower() == 'source' and source_name:
-            join_clause += f"{{{{ source('{source_name}', '{table_name}') }}}}"
-        else:
-            join_clause += f"{{{{ ref('{table_name}') }}}}"
-
-        # Add alias if provided
-        if alias:
-            join_clause += f" AS {alias}"
-
-        # Add join condition
-        if join_condition:
-            # Replace table aliases if needed
-            join_condition = join_condition.replace("main.", f"{main_table_alias}.")
-
-            # Add source alias to column references if not already present
-            # This regex finds column names that don't have a table prefix
-            import re
-            column_pattern = r'(?<![a-zA-Z0-9_\.])([a-zA-Z0-9_]+)(?=\s*=)'
-
-            def add_source_alias(match):
-                col = match.group(1)
-                # Skip adding alias to literals or functions
-                if col.upper() in ['AND', 'OR', 'ON', 'NULL']:
-                    return col
-                return f"{main_table_alias}.{col}"
-
-            join_condition = re.sub(column_pattern, add_source_alias, join_condition)
-            join_clause += f" ON {join_condition}"
-
-        join_clauses.append(join_clause)
-        join_aliases = set()
-        for row in range(join_header_row + 1, mapping_sheet.max_row + 1):
-            alias = mapping_sheet.cell(row=row, column=5).value
-            if alias:
-                join_aliases.add(alias)
-
-    return join_clauses, join_aliases
-
-
-def extract_where_condition(mapping_sheet, main_table_alias='source'):
-    """Extract WHERE condition from mapping sheet"""
-    # Find the WHERE_CONDITIONS section
-    where_section_row = None
-    for row in range(1, mapping_sheet.max_row + 1):
-        if mapping_sheet.cell(row=row, column=1).value == 'WHERE_CONDITIONS':
-            where_section_row = row
-            break
-
-    if not where_section_row:
-        return None
-
-    # Get the condition from the merged cell
-    where_condition = mapping_sheet.cell(row=where_section_row, column=2).value
-
-    if where_condition:
-        # Replace table aliases if needed
-        where_condition = where_condition.replace("main.", f"{main_table_alias}.")
-        return where_condition
-
-    return None
-
-
-def extract_group_by(mapping_sheet, main_table_alias='source'):
-    """Extract GROUP BY clause from mapping sheet"""
-    # Find the GROUP BY section
-    group_by_row = None
-    for row in range(1, mapping_sheet.max_row + 1):
-        if mapping_sheet.cell(row=row, column=1).value == 'GROUP BY':
-            group_by_row = row
-            break
-
-    if not group_by_row:
-        return None
-
-    # Get the group by columns from the merged cell
-    group_by = mapping_sheet.cell(row=group_by_row, column=2).value
-
-    if group_by:
-        # Replace table aliases if needed
-        group_by = group_by.replace("main.", f"{main_table_alias}.")
-        return group_by
-
-    return None
-
-def merge_sql_generator(config_file,mapping_sheet=None, target_ddl_path=None):
-    """Generate a MERGE SQL statement from JSON configuration"""
-
-    with open(config_file) as f:
-        config = json.load(f)
-
-    # Extract source information
-    source_schema = config['Source']['Schema']
-    source_table = config['Source']['Table Name']
-    source_name = config['Source']['Name']
+def render_merge_sql(model_ir):
+    """
+    Render the MERGE macro of a model
 
-    # Extract target information
-    target_schema = config['Target']['Schema']
-    target_table = config['Target']['Table Name']
+    Returns:
+        tuple: (macro name, macro SQL)
+    """
+    # Extract source and target information
+    source_schema = model_ir.source_schema
+    source_table = model_ir.source_table
+    target_schema = model_ir.target_schema
+    target_table = model_ir.target_table
+    main_table_alias = model_ir.main_table_alias
 
-    main_table_alias = 'source_table'
     # Generate file name
-    macro_name = f"MAC_{config['Target']['Schema']}_{config['Target']['Table Name']}_MERGE"
-
-
-
-    # Get target DDL columns and unique keys if path provided
-    target_columns = []
-    target_unique_keys = []
-    if target_ddl_path :
-        target_columns, target_unique_keys = parse_ddl_file(target_ddl_path)
-        # Convert target_columns to dict for easier lookup
-        target_columns_dict = {col[0]: idx for idx, col in enumerate(target_columns)}
+    macro_name = f"MAC_{target_schema}_{target_table}_MERGE"
 
     # Use unique keys for the ON condition
-    unique_keys = config['Target'].get('unique_key', [])
+    unique_keys = model_ir.unique_keys
     if not unique_keys:
         raise ValueError("Unique keys must be provided for MERGE operation.")
 
     # Build the ON condition
     on_condition = " AND ".join([f"target.{key} = source.{key}" for key in unique_keys])
 
-    # Build the INSERT and UPDATE clauses
-    insert_columns = []
-    insert_values = []
-    update_clauses = []
-
-    for column in config['Columns']:
-        target_col = column['Target Column']
-        logic = str(column['Logic'])
-
-        # Skip unwanted columns
-        if target_col in ["List (Y,N)", "Table Type", "ref"] or column['Logic'] == column['Target Column']:
-            continue
-
-        insert_columns.append(target_col)
-        insert_values.append(logic)
-        update_clauses.append(f"target.{target_col} = source.{target_col}")
-
-    insert_columns_str = ", ".join(insert_columns)
-    insert_values_str = ", ".join(insert_values)
-    update_clauses_str = ", ".join(update_clauses)
-    merge_sql = '{% macro'
-    merge_sql+=f" {macro_name}() "
-    merge_sql+='%}\n'
-    merge_sql+="    {% set query %}\n"
+    # The hash column is written from the computed hash, not from the mapping
+    hash_column = model_ir.merge_hash_column
+    select_columns = [column for column in model_ir.select_columns if column.target_column != hash_column]
+    columns = [column for column in model_ir.columns if column.target_column != hash_column]
+    update_columns = [column for column in model_ir.update_columns if column != hash_column]
+
+    # The USING query selects every column under its target name, so the INSERT and UPDATE
+    # clauses can refer to source.<column>; sequence values are only drawn on insert
+    select_values = [f"{column.logic} AS {quote_identifier(column.target_column)}"
+                     for column in select_columns]
+    insert_columns = [quote_identifier(column.target_column) for column in columns]
+    insert_values = [
+        column.logic if is_sequence_logic(column.logic) else f"source.{quote_identifier(column.target_column)}"
+        for column in columns
+    ]
+    update_clauses = [f"target.{quote_identifier(column)} = source.{quote_identifier(column)}"
+                      for column in update_columns]
+
+    # Only rewrite matched rows whose non-key columns changed
+    matched_condition = ''
+    hash_columns = model_ir.hash_columns if model_ir.merge_hash_diff else []
+    if model_ir.persisted_hash:
+        # Persist the hash so the target side is read instead of recomputed
+        quoted_hash, hash_logic = model_ir.persisted_hash
+        select_values.append(f"{hash_logic} AS {quoted_hash}")
+        insert_columns.append(quoted_hash)
+        insert_values.append(f"source.{quoted_hash}")
+        update_clauses.append(f"target.{quoted_hash} = source.{quoted_hash}")
+        matched_condition = f" AND target.{quoted_hash} IS DISTINCT FROM source.{quoted_hash}"
+    elif hash_columns:
+        quoted_columns = [quote_identifier(column.target_column) for column in hash_columns]
+        source_hash = hash_expression(f"source.{column}" for column in quoted_columns)
+        target_hash = hash_expression(f"target.{column}" for column in quoted_columns)
+        matched_condition = f" AND {source_hash} <> {target_hash}"
+
+    # Select from the source with the JOIN clauses, WHERE and GROUP BY from the mapping sheet,
+    # limited to the current batch for batched macros and to one row per key with DEDUP
+    using_query = format_select(
+        select_values,
+        f"{source_schema}.{source_table} AS {main_table_alias}",
+        model_ir.clauses_with(model_ir.batch_condition, model_ir.dedup_qualify),
+        indent=INDENT
+    )
 
-    model_content=f"""
-        SELECT {insert_values_str}
-        FROM {source_schema}.{source_table} AS source
-    """
-    # Add JOIN clauses if mapping_sheet is provided and contains joins
-    if mapping_sheet:
-        join_clauses, join_aliases = extract_join_clauses(mapping_sheet, main_table_alias)
-        if join_clauses:
-            model_content += "\n\t\t\t" + "\n\t\t\t".join(join_clauses)
+    # Construct the MERGE SQL statement
+    final_merge = render_template(
+        'merge_statement',
+        target_name=f"{target_schema}.{target_table}",
+        using_query=using_query,
+        on_condition=on_condition,
+        matched_condition=matched_condition,
+        update_clauses=format_list(update_clauses),
+        insert_columns=format_list(insert_columns),
+        insert_values=format_list(insert_values)
+    )
 
-        # Add WHERE clause if provided
-    where_condition = extract_where_condition(mapping_sheet, main_table_alias)
-    if where_condition:
-        model_content += f"\n\t\t\tWHERE {where_condition}"
+    statement = format_sql(final_merge, model_ir.sql_formatter)
+    if model_ir.batch_column:
+        return macro_name, render_template(
+            'batched_macro',
+            macro_name=macro_name,
+            bounds_query=model_ir.batch_bounds_query,
+            batch_size=model_ir.batch_size,
+            statement=statement
+        )
+    return macro_name, render_template('merge_macro', macro_name=macro_name, statement=statement)
 
-    # Add GROUP BY clause if provided
-    group_by = extract_group_by(mapping_sheet, main_table_alias)
-    if group_by:
-        model_content += f"\n\t\t\tGROUP BY {group_by}"
 
-        # Format the SQL statement using sqlparse
-    formatted_model_content = sqlparse.format(
-        model_content,
-        reindent_aligned=True,
-        indent_tabs=True,
-        keyword_case='upper'
-    )
+def merge_sql_generator(config_file, mapping_sheet=None, target_ddl_path=None, model_ir=None):
+    """Generate a MERGE SQL statement from JSON configuration, or from an already built model IR"""
+    if model_ir is None:
+        model_ir = load_model_ir(config_file, mapping_sheet, target_ddl_path)
 
-    # Construct the MERGE SQL statement
-    final_merge = f"""
-    MERGE INTO {target_schema}.{target_table} AS target
-        USING (
-            {formatted_model_content}
-        ) AS source
-        ON {on_condition}
-        WHEN MATCHED THEN
-            UPDATE SET {update_clauses_str}
-        WHEN NOT MATCHED THEN
-            INSERT ({insert_columns_str})
-            VALUES ({insert_values_str});\n
-"""
-        # Format the SQL statement using sqlparse
-    formatted_final_merge = sqlparse.format(
-        final_merge,
-        reindent_aligned=True,
-        indent_tabs=True,
-        keyword_case='upper'
-    )
+    macro_name, merge_sql = render_merge_sql(model_ir)
 
-    merge_sql += formatted_final_merge
-    merge_sql += "\n\t{% endset %}\n"
-    merge_sql += "  {% set results = run_query(query) %}  \n"
-    merge_sql+="{% endmacro %}"
     # Create output directory if it doesn't exist
     output_dir = 'macros'
     os.makedirs(output_dir, exist_ok=True)
@@ -253,7 +116,6 @@ def merge_sql_generator(config_file,mapping_sheet=None, target_ddl_path=None):
 
 
     # Write model file
-    with open(file_path, 'w') as f:
-        f.write(merge_sql)
+    write_if_changed(file_path, merge_sql)
 
     return True,file_path
@@ -0,0 +1,524 @@
+"""
+Shared intermediate representation of a model.
+
+The dbt model, MERGE and INSERT generators all render the same model: its source and target,
+the mapped columns in target DDL order, the joins, WHERE condition, GROUP BY and the mapping
+options. build_model_ir() derives all of it once per mapping, with one set of rules, and each
+generator only renders it.
+"""
+import os
+import re
+
+from scripts.utils.column_model import load_model_config
+from scripts.utils.ddl_parser import get_table_definition
+from scripts.utils.excel_utils import get_mapping_header_value, is_mapping_option_enabled
+from scripts.utils.sql_formatter import FAST_FORMATTER, get_sql_formatter
+
+MAIN_TABLE_ALIAS = 'source'
+SKIPPED_TARGET_COLUMNS = ("List (Y,N)", "Table Type", "ref")
+DEFAULT_MERGE_UPDATE_EXCLUDE_COLUMNS = ["CREATE_DT", "CREATE_BY", "CREATE_PGM"]
+# Audit columns that change on every run and would defeat the MERGE hash diff
+DEFAULT_MERGE_HASH_EXCLUDE_COLUMNS = ["UPDATE_DT", "UPDATE_BY", "UPDATE_PGM"]
+# Source audit columns used as the incremental watermark when WATERMARK_COLUMN is not set
+WATERMARK_CANDIDATES = ("UPDATE_DT", "LAST_UPDATE_DT", "UPD_DT", "LAST_UPD_DT", "MODIFIED_DT",
+                        "LAST_MODIFIED_DT", "UPDATED_AT")
+# Kinds of BATCH_COLUMN, with the default BATCH_SIZE of each: a key range or a number of days
+NUMBER_BATCH = 'number'
+DATE_BATCH = 'date'
+DEFAULT_BATCH_SIZES = {NUMBER_BATCH: 1000000, DATE_BATCH: 30}
+# Date batches are ranged over days since this date
+_BATCH_EPOCH = "'1970-01-01'::DATE"
+# Plain, optionally alias qualified, column reference in a column's logic
+_COLUMN_REFERENCE = re.compile(r'^(?:([A-Za-z_][A-Za-z0-9_$]*)\.)?([A-Za-z_][A-Za-z0-9_$]*)$')
+
+# One token of a join condition; strings, quoted identifiers and Jinja are kept whole
+_CONDITION_TOKEN = re.compile(r"""
+    (?P<string>'(?:[^']|'')*')
+  | (?P<jinja>\{\{.*?\}\}|\{%.*?%\})
+  | (?P<name>(?:[A-Za-z_][A-Za-z0-9_$]*|"(?:[^"]|"")*")(?:\.(?:[A-Za-z_][A-Za-z0-9_$]*|"(?:[^"]|"")*"))*)
+  | (?P<number>[0-9][A-Za-z0-9_.]*)
+  | (?P<space>\s+)
+  | (?P<op><=|>=|!=|<>|.)
+""", re.VERBOSE | re.DOTALL)
+_CONDITION_KEYWORDS = {'AND', 'OR', 'ON', 'NULL'}
+# Qualifier the mapping sheet uses for the main table
+_MAIN_QUALIFIER = 'MAIN'
+
+def is_sequence_logic(logic):
+    """Check whether a column's logic draws a value from a sequence"""
+    return "NEXTVAL" in str(logic)
+
+
+def copied_source_column(logic, main_table_alias=MAIN_TABLE_ALIAS):
+    """
+    Name of the main table column a column's logic copies as is
+
+    Returns None for expressions and for columns of joined tables, whose references carry
+    another alias than the main table's (or 'main.').
+    """
+    match = _COLUMN_REFERENCE.match(str(logic).strip())
+    if not match:
+        return None
+    qualifier = match.group(1)
+    if qualifier and qualifier.upper() not in (main_table_alias.upper(), _MAIN_QUALIFIER):
+        return None
+    return match.group(2)
+
+
+def quote_identifier(name):
+    """Quote column names containing spaces or parentheses"""
+    if ' ' in name or '(' in name or ')' in name:
+        return f'"{name}"'
+    return name
+
+
+def hash_expression(values):
+    """Snowflake HASH over the given values; NULLs hash consistently"""
+    return f"HASH({', '.join(values)})"
+
+
+def rewrite_condition(condition, main_table_alias=MAIN_TABLE_ALIAS, known_aliases=None,
+                      qualify_unqualified=True):
+    """
+    Rewrite a condition from the mapping sheet in one pass over its tokens
+
+    'main.' qualifiers are pointed at the main table. With qualify_unqualified, column names
+    directly in front of '=' without a table alias are qualified with the main table alias.
+    String literals, quoted identifiers and Jinja expressions are left untouched.
+
+    Args:
+        condition (str): Condition as written in the mapping sheet
+        main_table_alias (str): Alias of the main table
+        known_aliases (set): Upper case aliases in scope; other two part references are reported
+        qualify_unqualified (bool): Whether to qualify column names in front of '='
+
+    Returns:
+        str: The rewritten condition
+    """
+    tokens = [(match.lastgroup, match.group()) for match in _CONDITION_TOKEN.finditer(condition)]
+    parts = []
+    for index, (kind, text) in enumerate(tokens):
+        if kind == 'name':
+            qualifier, dot, column = text.partition('.')
+            if dot and qualifier.upper() == _MAIN_QUALIFIER:
+                text = f"{main_table_alias}.{column}"
+            elif dot:
+                if known_aliases is not None and '.' not in column and qualifier.upper() not in known_aliases:
+                    print(f"WARNING: Condition references unknown alias '{qualifier}': {condition}")
+            elif qualify_unqualified and text.upper() not in _CONDITION_KEYWORDS:
+                # Look past whitespace for a plain '=' comparison
+                following = index + 1
+                if following < len(tokens) and tokens[following][0] == 'space':
+                    following += 1
+                if following < len(tokens) and tokens[following] == ('op', '='):
+                    text = f"{main_table_alias}.{text}"
+        parts.append(text)
+    return ''.join(parts)
+
+
+def find_watermark(columns, watermark_column=None):
+    """
+    Find the source column filtering incremental runs and the target column holding its maximum
+
+    Args:
+        columns (list): Mapped ColumnMapping records
+        watermark_column (str): Source column from the mapping sheet, required for columns of
+            joined tables; without it the first WATERMARK_CANDIDATES column the mapping copies
+            from the main table is used
+
+    Returns:
+        tuple: (source column, target column), or (None, None) if there is no watermark
+    """
+    # Main table columns copied as they are, by their name; a joined table's audit column is
+    # no watermark for the source, and filtering on it would drop rows the LEFT JOIN did not match
+    copied = {}
+    for column in columns:
+        source_column = copied_source_column(column.logic)
+        if source_column:
+            copied.setdefault(source_column.upper(), (source_column, column.target_column))
+
+    if watermark_column:
+        name = watermark_column.split('.')[-1]
+        _, target_column = copied.get(name.upper(), (None, name))
+        return rewrite_condition(watermark_column, qualify_unqualified=False), target_column
+    for candidate in WATERMARK_CANDIDATES:
+        if candidate in copied:
+            source_column, target_column = copied[candidate]
+            return rewrite_condition(source_column, qualify_unqualified=False), target_column
+    return None, None
+
+
+def get_batch_options(mapping_sheet, main_table_alias=MAIN_TABLE_ALIAS):
+    """
+    Read BATCH_COLUMN, BATCH_COLUMN_TYPE and BATCH_SIZE from a mapping sheet
+
+    Returns:
+        tuple: (batch column or None, batch column type, batch size)
+
+    Raises:
+        ValueError: If the column is not a main table column, the type is unknown or the size
+            is not a positive integer
+    """
+    batch_column = get_mapping_header_value(mapping_sheet, 'BATCH_COLUMN')
+    batch_type = str(get_mapping_header_value(mapping_sheet, 'BATCH_COLUMN_TYPE', NUMBER_BATCH)).strip().lower()
+    if batch_type not in DEFAULT_BATCH_SIZES:
+        raise ValueError(f"Unknown BATCH_COLUMN_TYPE '{batch_type}', expected NUMBER or DATE")
+    size_value = get_mapping_header_value(mapping_sheet, 'BATCH_SIZE', DEFAULT_BATCH_SIZES[batch_type])
+    try:
+        batch_size = int(size_value)
+    except (TypeError, ValueError):
+        batch_size = 0
+    if batch_size <= 0:
+        raise ValueError(f"BATCH_SIZE must be a positive integer, got '{size_value}'")
+    if not batch_column:
+        return None, batch_type, batch_size
+
+    # The batch bounds are read from the main table alone, so a joined table's column cannot range it
+    batch_column = str(batch_column).strip()
+    match = _COLUMN_REFERENCE.match(batch_column)
+    if not match or (match.group(1) and match.group(1).upper() not in (main_table_alias.upper(), _MAIN_QUALIFIER)):
+        raise ValueError(f"BATCH_COLUMN must be a column of the main table, unqualified or qualified "
+                         f"with '{main_table_alias}.' or 'main.', got '{batch_column}'")
+    if match.group(1):
+        batch_column = f"{main_table_alias}.{match.group(2)}"
+    return batch_column, batch_type, batch_size
+
+
+def _find_section_row(mapping_sheet, section):
+    for row in range(1, mapping_sheet.max_row + 1):
+        if mapping_sheet.cell(row=row, column=1).value == section:
+            return row
+    return None
+
+
+def extract_join_clauses(mapping_sheet, main_table_alias=MAIN_TABLE_ALIAS):
+    """
+    Extract join clauses from the JOIN_TABLES section of a mapping sheet
+
+    Returns:
+        tuple: (list of JOIN clauses, set of join aliases)
+    """
+    join_clauses = []
+    join_aliases = set()
+    # Aliases and table names a join condition may refer to, upper case
+    known_aliases = {main_table_alias.upper()}
+    join_section_row = _find_section_row(mapping_sheet, 'JOIN_TABLES')
+    if not join_section_row:
+        return join_clauses, join_aliases
+
+    # Join table headers are in the next row
+    for row in range(join_section_row + 2, mapping_sheet.max_row + 1):
+        join_type = mapping_sheet.cell(row=row, column=1).value
+        table_type = mapping_sheet.cell(row=row, column=2).value
+        source_name = mapping_sheet.cell(row=row, column=3).value
+        table_name = mapping_sheet.cell(row=row, column=4).value
+        alias = mapping_sheet.cell(row=row, column=5).value
+        join_condition = mapping_sheet.cell(row=row, column=6).value
+
+        # Stop when we reach an empty row followed by a new section
+        if not join_type or not table_name:
+            if mapping_sheet.cell(row=row + 1, column=1).value in ('WHERE_CONDITIONS', 'GROUP BY'):
+                break
+            continue
+
+        if table_type and table_type.lower() == 'source' and source_name:
+            join_clause = f"{join_type} JOIN {{{{ source('{source_name}', '{table_name}') }}}}"
+        else:
+            join_clause = f"{join_type} JOIN {{{{ ref('{table_name}') }}}}"
+
+        known_aliases.add(str(table_name).split('.')[-1].upper())
+        if alias:
+            join_clause += f" AS {alias}"
+            join_aliases.add(alias)
+            known_aliases.add(str(alias).upper())
+
+        if join_condition:
+            join_clause += f" ON {rewrite_condition(join_condition, main_table_alias, known_aliases)}"
+
+        join_clauses.append(join_clause)
+
+    return join_clauses, join_aliases
+
+
+def extract_section_value(mapping_sheet, section, main_table_alias=MAIN_TABLE_ALIAS):
+    """Extract the value next to a WHERE_CONDITIONS or GROUP BY section label"""
+    section_row = _find_section_row(mapping_sheet, section)
+    if not section_row:
+        return None
+
+    value = mapping_sheet.cell(row=section_row, column=2).value
+    if not value:
+        return None
+    return rewrite_condition(value, main_table_alias, qualify_unqualified=False)
+
+
+class ModelIR:
+    """Everything the generators render for one model, derived once from its configuration"""
+
+    def __init__(self, config, columns, target_columns, target_unique_keys, join_clauses,
+                 join_aliases, where_condition, group_by, minus_logic_required, transient,
+                 merge_update_exclude_columns, sql_formatter=FAST_FORMATTER, merge_hash_diff=False,
+                 merge_hash_column=None, merge_hash_exclude_columns=DEFAULT_MERGE_HASH_EXCLUDE_COLUMNS,
+                 watermark_column=None, watermark_target_column=None, batch_column=None,
+                 batch_type=NUMBER_BATCH, batch_size=DEFAULT_BATCH_SIZES[NUMBER_BATCH], dedup=False,
+                 dedup_order_column=None, cluster_by=None, incremental_predicates=None):
+        self.config = config
+        source = config['Source']
+        target = config['Target']
+        self.source_type = source['Type'].lower()
+        self.source_db = source['Database']
+        self.source_schema = source['Schema']
+        self.source_table = source['Table Name']
+        self.source_name = source['Name']
+        self.target_schema = target['Schema']
+        self.target_table = target['Table Name']
+        self.target_name = f"{self.target_schema}.{self.target_table}"
+        self.materialization = target['materialization']
+
+        unique_keys = target.get('unique_key') or []
+        self.unique_keys = list(unique_keys) if isinstance(unique_keys, list) else [unique_keys]
+
+        self.main_table_alias = MAIN_TABLE_ALIAS
+        self.columns = columns
+        self.target_columns = target_columns
+        self.target_unique_keys = target_unique_keys
+        self.join_clauses = join_clauses
+        self.join_aliases = join_aliases
+        self.where_condition = where_condition
+        self.group_by = group_by
+        self.minus_logic_required = minus_logic_required
+        self.transient = transient
+        self.merge_update_exclude_columns = merge_update_exclude_columns
+        self.sql_formatter = sql_formatter
+        self.merge_hash_diff = merge_hash_diff
+        self.merge_hash_column = merge_hash_column
+        self.merge_hash_exclude_columns = merge_hash_exclude_columns
+        self.watermark_column = watermark_column
+        self.watermark_target_column = watermark_target_column
+        if batch_column and '.' not in batch_column:
+            batch_column = f"{self.main_table_alias}.{batch_column}"
+        self.batch_column = batch_column
+        self.batch_type = batch_type
+        self.batch_size = batch_size
+        self.dedup = dedup
+        self.dedup_order_column = dedup_order_column
+        self.cluster_by = cluster_by or []
+        self.incremental_predicates = incremental_predicates or []
+
+    @property
+    def select_columns(self):
+        """Columns selected from the source; sequence values are only drawn on insert"""
+        return [column for column in self.columns if not is_sequence_logic(column.logic)]
+
+    @property
+    def clauses(self):
+        """JOIN clauses followed by the WHERE and GROUP BY lines"""
+        return self.clauses_with()
+
+    def clauses_with(self, condition=None, qualify=None):
+        """clauses with an extra condition added to the WHERE and an optional QUALIFY line"""
+        clauses = list(self.join_clauses)
+        if self.where_condition and condition:
+            clauses.append(f"WHERE ({self.where_condition}) AND {condition}")
+        elif self.where_condition or condition:
+            clauses.append(f"WHERE {self.where_condition or condition}")
+        if self.group_by:
+            clauses.append(f"GROUP BY {self.group_by}")
+        if qualify:
+            clauses.append(qualify)
+        return clauses
+
+    @property
+    def dedup_qualify(self):
+        """QUALIFY keeping the latest source row per unique key, or None"""
+        if not self.dedup or not self.unique_keys:
+            return None
+        # Partition by the keys' source expressions, select list aliases may shadow source columns
+        key_logic = {column.target_column: str(column.logic) for column in self.select_columns}
+        partition = ', '.join(key_logic.get(key, key) for key in self.unique_keys)
+        order_column = self.dedup_order_column or self.watermark_column
+        if not order_column:
+            # Still deterministic enough to avoid duplicate key errors, but the kept row is arbitrary
+            order_column = partition
+        elif '.' not in order_column:
+            order_column = f"{self.main_table_alias}.{order_column}"
+        return f"QUALIFY ROW_NUMBER() OVER (PARTITION BY {partition} ORDER BY {order_column} DESC) = 1"
+
+    @property
+    def batch_condition(self):
+        """Condition selecting one batch, between the batch_start and batch_end Jinja variables"""
+        if not self.batch_column:
+            return None
+        if self.batch_type == DATE_BATCH:
+            return (f"{self.batch_column} >= DATEADD(day, {{{{ batch_start }}}}, {_BATCH_EPOCH}) "
+                    f"AND {self.batch_column} < DATEADD(day, {{{{ batch_end }}}}, {_BATCH_EPOCH})")
+        return f"{self.batch_column} >= {{{{ batch_start }}}} AND {self.batch_column} < {{{{ batch_end }}}}"
+
+    @property
+    def batch_bounds_query(self):
+        """Query returning the first and last batch value of the main table, or None"""
+        if not self.batch_column:
+            return None
+        if self.batch_type == DATE_BATCH:
+            bounds = (f"DATEDIFF(day, {_BATCH_EPOCH}, MIN({self.batch_column})), "
+                      f"DATEDIFF(day, {_BATCH_EPOCH}, MAX({self.batch_column}))")
+        else:
+            bounds = f"FLOOR(MIN({self.batch_column})), MAX({self.batch_column})"
+        return f"SELECT {bounds} FROM {self.source_schema}.{self.source_table} AS {self.main_table_alias}"
+
+    @property
+    def watermark_filter(self):
+        """Condition selecting source rows changed since the last incremental run, or None"""
+        if self.materialization != 'incremental' or not self.watermark_column:
+            return None
+        source_column = self.watermark_column
+        if '.' not in source_column:
+            source_column = f"{self.main_table_alias}.{source_column}"
+        return (f"{source_column} > (SELECT COALESCE(MAX({quote_identifier(self.watermark_target_column)}), "
+                f"'1900-01-01') FROM {{{{ this }}}})")
+
+    def _mapped_update_columns(self):
+        return [column.target_column for column in self.select_columns
+                if column.target_column not in self.merge_update_exclude_columns]
+
+    @property
+    def update_columns(self):
+        """Target columns overwritten when an existing row is matched, the persisted hash included"""
+        update_columns = self._mapped_update_columns()
+        if self.persisted_hash and self.merge_hash_column not in update_columns:
+            update_columns.append(self.merge_hash_column)
+        return update_columns
+
+    @property
+    def hash_columns(self):
+        """Columns compared by the MERGE hash diff: the update columns except keys and audit columns"""
+        update_columns = set(self._mapped_update_columns())
+        excluded = set(self.unique_keys) | set(self.merge_hash_exclude_columns) | {self.merge_hash_column}
+        return [column for column in self.select_columns
+                if column.target_column in update_columns and column.target_column not in excluded]
+
+    @property
+    def persisted_hash(self):
+        """
+        MERGE_HASH_COLUMN and the HASH written to it
+
+        The MERGE, the INSERT macro and the model all write the same hash, so rows loaded by
+        any of them are compared by the next MERGE instead of all looking changed.
+
+        Returns:
+            tuple: (quoted hash column, HASH expression over the source logic), or None
+        """
+        if not (self.merge_hash_diff and self.merge_hash_column):
+            return None
+        hash_columns = self.hash_columns
+        if not hash_columns:
+            return None
+        return (quote_identifier(self.merge_hash_column),
+                hash_expression(column.logic for column in hash_columns))
+
+
+def build_model_ir(config, mapping_sheet=None, target_table=None):
+    """
+    Derive the model IR from a model configuration
+
+    Args:
+        config (dict): Model configuration with ColumnMapping records as 'Columns'
+        mapping_sheet: Mapping worksheet for joins, WHERE, GROUP BY and options
+        target_table (TableDefinition): Target table DDL, used for column order
+
+    Returns:
+        ModelIR: The model IR
+    """
+    target_columns = []
+    target_unique_keys = []
+    if target_table:
+        target_columns = [(column.name, column.data_type) for column in target_table.columns]
+        target_unique_keys = list(target_table.unique_keys)
+
+    columns = [column for column in config['Columns']
+               if str(column.target_column) not in SKIPPED_TARGET_COLUMNS]
+    if target_columns:
+        # Columns missing from the target DDL keep their mapping order at the end
+        target_pos = {name: idx for idx, (name, _) in enumerate(target_columns)}
+        columns.sort(key=lambda column: target_pos.get(column.target_column, len(target_pos)))
+        print(f"Ordered columns based on target DDL: {[column.target_column for column in columns]}")
+
+    join_clauses = []
+    join_aliases = set()
+    where_condition = None
+    group_by = None
+    minus_logic_required = False
+    transient = False
+    merge_update_exclude_columns = DEFAULT_MERGE_UPDATE_EXCLUDE_COLUMNS
+    sql_formatter = FAST_FORMATTER
+    merge_hash_diff = False
+    merge_hash_column = None
+    merge_hash_exclude_columns = DEFAULT_MERGE_HASH_EXCLUDE_COLUMNS
+    watermark_column = None
+    batch_column, batch_type, batch_size = None, NUMBER_BATCH, DEFAULT_BATCH_SIZES[NUMBER_BATCH]
+    dedup = False
+    dedup_order_column = None
+    cluster_by = []
+    incremental_predicates = []
+    if mapping_sheet:
+        join_clauses, join_aliases = extract_join_clauses(mapping_sheet)
+        where_condition = extract_section_value(mapping_sheet, 'WHERE_CONDITIONS')
+        group_by = extract_section_value(mapping_sheet, 'GROUP BY')
+        minus_logic_required = is_mapping_option_enabled(mapping_sheet, 'MINUS_LOGIC_REQUIRED')
+        transient = is_mapping_option_enabled(mapping_sheet, 'TRANSIENT_TABLE')
+        exclude_value = get_mapping_header_value(mapping_sheet, 'MERGE_UPDATE_EXCLUDE_COLUMNS')
+        if exclude_value:
+            merge_update_exclude_columns = [column.strip() for column in exclude_value.split(',')]
+        sql_formatter = get_sql_formatter(get_mapping_header_value(mapping_sheet, 'SQL_FORMATTER'))
+        # Naming a hash column implies the hash diff
+        merge_hash_column = get_mapping_header_value(mapping_sheet, 'MERGE_HASH_COLUMN')
+        if merge_hash_column:
+            merge_hash_column = str(merge_hash_column).strip()
+        merge_hash_diff = is_mapping_option_enabled(mapping_sheet, 'MERGE_HASH_DIFF') or bool(merge_hash_column)
+        hash_exclude_value = get_mapping_header_value(mapping_sheet, 'MERGE_HASH_EXCLUDE_COLUMNS')
+        if hash_exclude_value:
+            merge_hash_exclude_columns = [column.strip() for column in hash_exclude_value.split(',')]
+        watermark_column = get_mapping_header_value(mapping_sheet, 'WATERMARK_COLUMN')
+        if watermark_column:
+            watermark_column = str(watermark_column).strip()
+        batch_column, batch_type, batch_size = get_batch_options(mapping_sheet)
+        # Naming an order column implies the dedup
+        dedup_order_column = get_mapping_header_value(mapping_sheet, 'DEDUP_ORDER_COLUMN')
+        if dedup_order_column:
+            dedup_order_column = rewrite_condition(str(dedup_order_column).strip(), qualify_unqualified=False)
+        dedup = is_mapping_option_enabled(mapping_sheet, 'DEDUP_ON_UNIQUE_KEY') or bool(dedup_order_column)
+        cluster_value = get_mapping_header_value(mapping_sheet, 'CLUSTER_BY')
+        if cluster_value:
+            cluster_by = [column.strip() for column in str(cluster_value).split(',') if column.strip()]
+            mapped = {column.target_column for column in columns}
+            for column in cluster_by:
+                if column not in mapped:
+                    print(f"WARNING: CLUSTER_BY column {column} is not a mapped target column")
+        # Predicates may contain commas, so they are separated by new lines or ';'
+        predicates_value = get_mapping_header_value(mapping_sheet, 'INCREMENTAL_PREDICATES')
+        if predicates_value:
+            incremental_predicates = [predicate.strip() for predicate in re.split(r'[;\n]', str(predicates_value))
+                                      if predicate.strip()]
+
+    watermark_column, watermark_target_column = find_watermark(columns, watermark_column)
+    if watermark_column and config['Target']['materialization'] == 'incremental':
+        print(f"Incremental watermark: {watermark_column} against {watermark_target_column}")
+    if dedup and not (dedup_order_column or watermark_column):
+        print("WARNING: DEDUP_ON_UNIQUE_KEY without DEDUP_ORDER_COLUMN or a watermark keeps an arbitrary row per key.")
+
+    return ModelIR(config, columns, target_columns, target_unique_keys, join_clauses, join_aliases,
+                   where_condition, group_by, minus_logic_required, transient,
+                   merge_update_exclude_columns, sql_formatter, merge_hash_diff, merge_hash_column,
+                   merge_hash_exclude_columns, watermark_column, watermark_target_column, batch_column,
+                   batch_type, batch_size, dedup, dedup_order_column, cluster_by, incremental_predicates)
+
+
+def load_model_ir(config_file, mapping_sheet=None, target_ddl_path=None):
+    """Load a model configuration JSON file and derive its IR, reading the target DDL if given"""
+    config = load_model_config(config_file)
+    target_table = None
+    if target_ddl_path and os.path.exists(target_ddl_path):
+        target_table = get_table_definition(
+            target_ddl_path, f"{config['Target']['Schema']}.{config['Target']['Table Name']}"
+        )
+    return build_model_ir(config, mapping_sheet, target_table)
@@ -1,9 +1,11 @@
 import os
 from tkinter import messagebox
 from openpyxl import load_workbook
-import snowflake.connector
 import openpyxl.worksheet.datavalidation
 
+from scripts.utils.excel_utils import CONFIG_SHEET_PARAMS
+from scripts.utils.metadata_providers import get_metadata_provider
+
 class ModelMapper:
     def __init__(self):
         self.audit_columns = {
@@ -16,40 +18,85 @@ class ModelMapper:
             "UPDATE_PGM": lambda s, t: f"'{s}.{t}'"
         }
 
-    def generate_model_mapping(self, file_path):
-        """Generate model mapping using Snowflake connection"""
+    def generate_model_mapping(self, file_path, metadata_backend=None, metadata_path=None):
+        """Generate model mapping using the configured metadata backend (Snowflake by default)"""
+        return self.generate_model_mappings([file_path], metadata_backend, metadata_path)[0]
+
+    def generate_model_mappings(self, file_paths, metadata_backend=None, metadata_path=None):
+        """
+        Generate model mappings for several mapping files
+
+        Source metadata for all files sharing the same Config sheet settings is fetched in
+        one batch, concurrently where the backend supports it.
+
+        Returns:
+            list: (mapped_count, total_count) for each file, in the order given
+        """
         try:
-            # Load and validate workbook
-            workbook, mapping_sheet, config_sheet = self._load_workbook(file_path)
-            
-            # Get table information
-            target_table, source_table = self._get_table_info(mapping_sheet)
-            
-            # Parse table names
-            source_info, target_info = self._parse_table_names(source_table, target_table)
-            
-            # Get Snowflake configuration
-            snowflake_config = self._get_snowflake_config(config_sheet)
-            
-            # Connect to Snowflake and get column information
-            columns = self._get_snowflake_columns(snowflake_config, source_info)
-            
-            # Update mapping sheet
-            mapped_count, total_count = self._update_mapping_sheet(
-                mapping_sheet, 
-                columns, 
-                source_info, 
-                target_info
-            )
-            
-            # Save workbook
-            workbook.save(file_path)
-            
-            return mapped_count, total_count
+            mappings = [self._prepare_mapping(file_path) for file_path in file_paths]
+
+            # Group mappings by connection settings so each group shares one provider
+            groups = {}
+            for mapping in mappings:
+                key = tuple(sorted(mapping['snowflake_config'].items()))
+                groups.setdefault(key, []).append(mapping)
+
+            for group in groups.values():
+                tables = [self._table_key(mapping['source_info']) for mapping in group]
+                with get_metadata_provider(
+                    group[0]['snowflake_config'],
+                    backend=metadata_backend,
+                    path=metadata_path,
+                    generator='model_mapper'
+                ) as provider:
+                    columns_by_table = provider.get_columns_for_tables(tables)
+                for mapping in group:
+                    mapping['columns'] = columns_by_table[self._table_key(mapping['source_info'])]
+
+            results = []
+            for mapping in mappings:
+                # Update mapping sheet
+                mapped_count, total_count = self._update_mapping_sheet(
+                    mapping['mapping_sheet'],
+                    mapping['columns'],
+                    mapping['source_info'],
+                    mapping['target_info']
+                )
+
+                # Save workbook
+                mapping['workbook'].save(mapping['file_path'])
+                results.append((mapped_count, total_count))
+
+            return results
 
         except Exception as e:
             raise Exception(f"Model mapping generation failed: {str(e)}")
 
+    def _prepare_mapping(self, file_path):
+        """Load a mapping file and collect what is needed to fill it"""
+        # Load and validate workbook
+        workbook, mapping_sheet, config_sheet = self._load_workbook(file_path)
+
+        # Get table information
+        target_table, source_table = self._get_table_info(mapping_sheet)
+
+        # Parse table names
+        source_info, target_info = self._parse_table_names(source_table, target_table)
+
+        return {
+            'file_path': file_path,
+            'workbook': workbook,
+            'mapping_sheet': mapping_sheet,
+            'source_info': source_info,
+            'target_info': target_info,
+            'snowflake_config': self._get_snowflake_config(config_sheet)
+        }
+
+    @staticmethod
+    def _table_key(source_info):
+        """Metadata lookup key for a parsed source table"""
+        return source_info['database'], source_info['schema'], source_info['table']
+
     def _load_workbook(self, file_path):
         """Load and validate Excel workbook"""
         if not file_path:
@@ -117,45 +164,13 @@ class ModelMapper:
             if param == 'Snowflake Configuration':
                 in_snowflake_section = True
                 continue
-            if in_snowflake_section and param in ['ROLE', 'WAREHOUSE', 'DATABASE', 'ACCOUNT', 'USER', 'AUTHENTICATOR']:
+            if in_snowflake_section and param in CONFIG_SHEET_PARAMS:
                 value = config_sheet.cell(row=row, column=2).value
                 if value:
                     snowflake_config[param] = value
                     
         return snowflake_config
 
-    def _get_snowflake_columns(self, config, source_info):
-        """Get column information from Snowflake"""
-        conn = None
-        cursor = None
-        try:
-            conn = snowflake.connector.connect(
-                account=config['ACCOUNT'],
-                user=config['USER'],
-                authenticator=config['AUTHENTICATOR'],
-                warehouse=config['WAREHOUSE'],
-                role=config['ROLE'],
-                database=source_info['database'],
-                schema=source_info['schema']
-            )
-
-            cursor = conn.cursor()
-            cursor.execute(f"""
-                SELECT COLUMN_NAME
-                FROM {source_info['database']}.INFORMATION_SCHEMA.COLUMNS
-                WHERE TABLE_SCHEMA = '{source_info['schema']}'
-                AND TABLE_NAME = '{source_info['table']}'
-                ORDER BY ORDINAL_POSITION
-            """)
-            
-            return cursor.fetchall()
-            
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                conn.close()
-
     def _update_mapping_sheet(self, mapping_sheet, columns, source_info, target_info):
         """Update mapping sheet with column mappings"""
         start_row = 5  # Column mappings start from row 5
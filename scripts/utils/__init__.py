@@ -1,12 +1,77 @@
 from .snowflake_utils import get_snowflake_connection, get_table_columns
-from .excel_utils import get_config_from_sheet, get_table_info_from_sheet
-from .file_utils import extract_table_name, parse_ddl_file
+from .excel_utils import (
+    get_config_from_sheet,
+    get_table_info_from_sheet,
+    get_mapping_header_value,
+    is_mapping_option_enabled
+)
+from .file_utils import extract_table_name, extract_table_names, parse_ddl_file
+from .ddl_catalog import DDLCatalog
+from .ddl_parser import (
+    parse_ddl,
+    load_ddl_file,
+    load_ddl_index,
+    find_table_definition,
+    get_table_definition,
+    get_table_names,
+    scan_ddl_file
+)
+from .metadata_providers import (
+    MetadataProvider,
+    SnowflakeMetadataProvider,
+    SQLiteMetadataProvider,
+    SnapshotMetadataProvider,
+    export_snapshot,
+    import_snapshot,
+    load_snapshot,
+    get_metadata_provider
+)
+from .column_model import ColumnMapping, load_model_config, save_model_config
+from .snowflake_instrumentation import instrumentation, instrumented_connect
+from .key_profiler import profile_unique_key
+from .templates import get_template, render_template
+from .sql_formatter import format_list, format_select, format_sql
+from .format_cache import FormatCache
+from .artifact_writer import artifact_stats, write_if_changed
 
 __all__ = [
     'get_snowflake_connection',
     'get_table_columns',
     'get_config_from_sheet',
     'get_table_info_from_sheet',
+    'get_mapping_header_value',
+    'is_mapping_option_enabled',
     'extract_table_name',
-    'parse_ddl_file'
+    'extract_table_names',
+    'parse_ddl_file',
+    'parse_ddl',
+    'load_ddl_file',
+    'load_ddl_index',
+    'find_table_definition',
+    'get_table_definition',
+    'get_table_names',
+    'scan_ddl_file',
+    'DDLCatalog',
+    'MetadataProvider',
+    'SnowflakeMetadataProvider',
+    'SQLiteMetadataProvider',
+    'SnapshotMetadataProvider',
+    'export_snapshot',
+    'import_snapshot',
+    'load_snapshot',
+    'get_metadata_provider',
+    'ColumnMapping',
+    'load_model_config',
+    'save_model_config',
+    'instrumentation',
+    'instrumented_connect',
+    'profile_unique_key',
+    'get_template',
+    'render_template',
+    'format_list',
+    'format_select',
+    'format_sql',
+    'FormatCache',
+    'artifact_stats',
+    'write_if_changed'
 ] 
\ No newline at end of file
@@ -0,0 +1,103 @@
+"""
+Write-if-changed writer for generated artifacts.
+
+Models, macros, DAGs, job files, views and tests are only written when their bytes differ
+from the file on disk, so regenerating an unchanged artifact keeps its modification time.
+That preserves dbt partial parsing and stops Airflow from re-parsing unchanged DAG files.
+Writes go to a temporary file in the same directory and are renamed over the target, so a
+reader never sees a half written file; an updated file keeps its permissions.
+"""
+import hashlib
+import logging
+import os
+import shutil
+import threading
+
+CREATED = 'created'
+UPDATED = 'updated'
+UNCHANGED = 'unchanged'
+WRITE_STATUSES = (CREATED, UPDATED, UNCHANGED)
+
+
+class ArtifactWriteStats:
+    """Thread safe counts of created, updated and unchanged artifacts"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(WRITE_STATUSES, 0)
+
+    def record(self, status, path):
+        """Record the outcome of one write"""
+        with self._lock:
+            self._counts[status] += 1
+        logging.debug(f"Artifact {status}: {path}")
+
+    def reset(self):
+        """Forget all recorded writes, typically at the start of a run"""
+        with self._lock:
+            self._counts = dict.fromkeys(WRITE_STATUSES, 0)
+
+    def counts(self):
+        """Return a copy of the counts per status"""
+        with self._lock:
+            return dict(self._counts)
+
+    def format_summary(self):
+        """One line summary suitable for the status bar, or '' when nothing was written"""
+        counts = self.counts()
+        if not any(counts.values()):
+            return ''
+        return "Files: " + ", ".join(f"{counts[status]} {status}" for status in WRITE_STATUSES)
+
+
+# Shared counts for the whole application
+artifact_stats = ArtifactWriteStats()
+
+
+def _encode(content):
+    # Match what a text mode write produces on this platform
+    if os.linesep != '\n':
+        content = content.replace('\n', os.linesep)
+    return content.encode('utf-8')
+
+
+def write_if_changed(path, content, stats=None):
+    """
+    Write an artifact unless the file already holds exactly the same bytes
+
+    Args:
+        path (str): Artifact path; its directory must exist
+        content (str): Artifact text
+        stats (ArtifactWriteStats): Where to count the outcome, the shared counts by default
+
+    Returns:
+        str: CREATED, UPDATED or UNCHANGED
+    """
+    data = _encode(content)
+    try:
+        # Sizes are compared first so most changed files are detected without reading them
+        if os.path.getsize(path) == len(data):
+            with open(path, 'rb') as f:
+                unchanged = hashlib.sha256(f.read()).digest() == hashlib.sha256(data).digest()
+        else:
+            unchanged = False
+        status = UNCHANGED if unchanged else UPDATED
+    except FileNotFoundError:
+        status = CREATED
+
+    if status != UNCHANGED:
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            if status == UPDATED:
+                # The rename replaces the file, so keep the permissions of the one it replaces
+                shutil.copymode(path, temp_path)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    (stats or artifact_stats).record(status, path)
+    return status
@@ -0,0 +1,75 @@
+"""
+Compact column records for model configurations.
+
+Model configuration JSON files carry their columns as dicts keyed by 'Target Column',
+'Source Table' and 'Logic'. In memory every column is a slotted ColumnMapping instead, with
+its strings interned, so batch runs holding thousands of wide models do not pay for a dict
+per column and for repeated copies of the same names.
+"""
+import json
+import sys
+
+TARGET_COLUMN = 'Target Column'
+SOURCE_TABLE = 'Source Table'
+LOGIC = 'Logic'
+
+
+def intern_value(value):
+    """Intern strings so repeated names share one object"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class ColumnMapping:
+    """A target column with the source table and logic it is mapped from"""
+
+    __slots__ = ('target_column', 'source_table', 'logic')
+
+    def __init__(self, target_column, source_table=None, logic="''"):
+        self.target_column = intern_value(target_column)
+        self.source_table = intern_value(source_table)
+        self.logic = intern_value(logic)
+
+    @classmethod
+    def from_dict(cls, column):
+        """Build a record from a model configuration column dict"""
+        return cls(column[TARGET_COLUMN], column.get(SOURCE_TABLE), column.get(LOGIC, "''"))
+
+    def to_dict(self):
+        """Model configuration column dict of the record"""
+        return {TARGET_COLUMN: self.target_column, SOURCE_TABLE: self.source_table, LOGIC: self.logic}
+
+    def __eq__(self, other):
+        if not isinstance(other, ColumnMapping):
+            return NotImplemented
+        return (self.target_column, self.source_table, self.logic) == \
+            (other.target_column, other.source_table, other.logic)
+
+    def __hash__(self):
+        return hash((self.target_column, self.source_table, self.logic))
+
+    def __repr__(self):
+        return f"ColumnMapping({self.target_column!r}, {self.source_table!r}, {self.logic!r})"
+
+
+def load_model_config(config_file):
+    """
+    Load a model configuration JSON file
+
+    Returns:
+        dict: Configuration whose 'Columns' is a list of ColumnMapping records
+    """
+    with open(config_file) as f:
+        config = json.load(f)
+    config['Columns'] = [ColumnMapping.from_dict(column) for column in config.get('Columns', [])]
+    return config
+
+
+def save_model_config(config, config_file):
+    """Write a model configuration, serialising ColumnMapping records as column dicts"""
+    data = dict(config)
+    data['Columns'] = [
+        column.to_dict() if isinstance(column, ColumnMapping) else column
+        for column in config.get('Columns', [])
+    ]
+    with open(config_file, 'w') as f:
+        json.dump(data, f, indent=2)
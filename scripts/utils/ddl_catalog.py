@@ -0,0 +1,294 @@
+"""
+Persistent catalog of the tables defined in known DDL files.
+
+The catalog maps every SCHEMA.TABLE to the file that defines it, the byte offsets of its
+CREATE TABLE (and CREATE UNIQUE INDEX) statements and a hash of their text. It is stored in
+data/ddl_catalog.json and updated incrementally: a file is only re-indexed when its
+modification time or size changes. Looking up a table is a dictionary access followed by a
+read of just its statements.
+"""
+import hashlib
+import json
+import logging
+import mmap
+import os
+import threading
+
+from .ddl_parser import (
+    MMAP_SCAN_THRESHOLD,
+    TableDefinition,
+    iter_create_statements,
+    parse_create_statement,
+    parse_ddl,
+    scan_ddl_file,
+    short_table_name,
+    table_key
+)
+
+DEFAULT_DDL_CATALOG_PATH = os.path.join('data', 'ddl_catalog.json')
+DDL_CATALOG_VERSION = 1
+DDL_FILE_EXTENSIONS = ('.sql', '.ddl')
+
+
+def _byte_offsets(text, spans):
+    """Convert character spans of text into (offset, length) byte spans of its UTF-8 encoding"""
+    if text.isascii():
+        return [(start, end - start) for start, end in spans]
+
+    byte_spans = []
+    char_position = 0
+    byte_position = 0
+    for start, end in spans:
+        byte_position += len(text[char_position:start].encode('utf-8'))
+        length = len(text[start:end].encode('utf-8'))
+        byte_spans.append((byte_position, length))
+        byte_position += length
+        char_position = end
+    return byte_spans
+
+
+def index_ddl_text(text):
+    """
+    Find the statements defining each table of a DDL text
+
+    Returns:
+        dict: SCHEMA.TABLE -> list of (start, end) character spans, table statement first
+    """
+    spans = {}
+    index_spans = []
+    for start, end, tokens in iter_create_statements(text):
+        result = parse_create_statement(tokens)
+        if isinstance(result, TableDefinition):
+            table_spans = spans.setdefault(short_table_name(result.name), [])
+            if (start, end) not in table_spans:
+                table_spans.append((start, end))
+        elif result:
+            index_spans.append((table_key(result[1]), (start, end)))
+
+    for reference, span in index_spans:
+        for name, table_spans in spans.items():
+            if name == reference or name.endswith('.' + reference):
+                table_spans.append(span)
+                break
+    return spans
+
+
+class DDLCatalog:
+    """Table name to DDL file index persisted as JSON"""
+
+    def __init__(self, path=DEFAULT_DDL_CATALOG_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self._files = {}
+        self._tables = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable DDL catalog {self.path}: {str(e)}")
+            return
+        if data.get('version') != DDL_CATALOG_VERSION:
+            return
+        self._files = data.get('files', {})
+        self._tables = data.get('tables', {})
+
+    def save(self):
+        """Write the catalog to disk"""
+        with self._lock:
+            data = {'version': DDL_CATALOG_VERSION, 'files': self._files, 'tables': self._tables}
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump(data, f, indent=2)
+            os.replace(temp_path, self.path)
+
+    def _drop_file(self, path):
+        for name in self._files.pop(path, {}).get('tables', {}):
+            if self._tables.get(name) == path:
+                del self._tables[name]
+                # Fall back to another known file defining the same table
+                for other_path, record in self._files.items():
+                    if name in record['tables']:
+                        self._tables[name] = other_path
+                        break
+
+    def add_file(self, ddl_path, save=True):
+        """
+        Index a DDL file unless it is unchanged since it was last indexed
+
+        Returns:
+            bool: True if the catalog changed
+        """
+        path = os.path.abspath(ddl_path)
+        with self._lock:
+            if not os.path.isfile(path):
+                changed = path in self._files
+                self._drop_file(path)
+            else:
+                stat = os.stat(path)
+                record = self._files.get(path)
+                if record and record['mtime_ns'] == stat.st_mtime_ns and record['size'] == stat.st_size:
+                    return False
+
+                self._drop_file(path)
+                tables = {}
+                for name, (statements, statement_hash) in self._index_file(path, stat.st_size).items():
+                    tables[name] = {
+                        'statements': [list(statement) for statement in statements],
+                        'hash': statement_hash
+                    }
+                    # The most recently indexed file wins
+                    self._tables[name] = path
+                self._files[path] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'tables': tables}
+                logging.info(f"Indexed {len(tables)} tables from DDL file {path}")
+                changed = True
+
+            if changed and save:
+                self.save()
+            return changed
+
+    def add_files(self, ddl_paths):
+        """
+        Index several DDL files, saving the catalog once
+
+        Returns:
+            int: Number of files that were (re)indexed
+        """
+        with self._lock:
+            changed = 0
+            for ddl_path in ddl_paths:
+                try:
+                    changed += self.add_file(ddl_path, save=False)
+                except OSError as e:
+                    logging.error(f"Error indexing DDL file {ddl_path}: {str(e)}")
+            if changed:
+                self.save()
+            return changed
+
+    def add_folder(self, folder, extensions=DDL_FILE_EXTENSIONS):
+        """
+        Index every DDL file below a folder
+
+        Returns:
+            int: Number of files that were (re)indexed
+        """
+        ddl_paths = []
+        for root, _, file_names in os.walk(folder):
+            ddl_paths.extend(os.path.join(root, file_name) for file_name in sorted(file_names)
+                             if file_name.lower().endswith(extensions))
+        return self.add_files(ddl_paths)
+
+    def refresh(self):
+        """Re-index known files that changed on disk and drop the ones that were removed"""
+        with self._lock:
+            return self.add_files(list(self._files))
+
+    def _index_file(self, path, size):
+        """
+        Locate the statements of every table in a DDL file
+
+        Returns:
+            dict: SCHEMA.TABLE -> ((offset, length) byte spans, hash of the statements)
+        """
+        if size >= MMAP_SCAN_THRESHOLD:
+            # Very large dumps are scanned through a memory map instead of being read and parsed
+            with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return {name: (statements, self._hash(mapped, statements))
+                        for name, statements in scan_ddl_file(path).items()}
+
+        with open(path, 'rb') as f:
+            content = f.read()
+        text = content.decode('utf-8', errors='replace')
+        indexed = {}
+        for name, spans in index_ddl_text(text).items():
+            statements = _byte_offsets(text, spans)
+            indexed[name] = (statements, self._hash(content, statements))
+        return indexed
+
+    @staticmethod
+    def _hash(content, statements):
+        digest = hashlib.sha256()
+        for offset, length in statements:
+            digest.update(content[offset:offset + length])
+        return digest.hexdigest()
+
+    def find(self, table_name):
+        """
+        Look up the catalog entry of a table
+
+        Args:
+            table_name (str): SCHEMA.TABLE, DATABASE.SCHEMA.TABLE or a bare table name
+
+        Returns:
+            dict: Entry with 'path', 'statements' and 'hash', or None
+        """
+        key = table_key(table_name)
+        with self._lock:
+            if key not in self._tables and '.' not in key:
+                # A bare table name matches when exactly one schema defines it
+                matches = [name for name in self._tables if name.split('.')[-1] == key]
+                key = matches[0] if len(matches) == 1 else None
+            path = self._tables.get(key)
+            if path is None:
+                return None
+            return dict(self._files[path]['tables'][key], path=path)
+
+    def find_file(self, table_name):
+        """Path of the DDL file defining a table, or None"""
+        entry = self.find(table_name)
+        return entry['path'] if entry else None
+
+    def get_table_definition(self, table_name):
+        """
+        Parse a table's definition by reading only its statements from the DDL file
+
+        A file that changed since it was indexed is re-indexed first.
+
+        Returns:
+            TableDefinition or None if no known file defines the table
+        """
+        entry = self.find(table_name)
+        if entry is None:
+            return None
+
+        content = self._read_statements(entry)
+        if content is None:
+            # The file changed or disappeared, re-index it and try again
+            self.add_file(entry['path'])
+            entry = self.find(table_name)
+            if entry is None:
+                return None
+            content = self._read_statements(entry)
+            if content is None:
+                return None
+
+        key = table_key(table_name)
+        for table in parse_ddl(content.decode('utf-8', errors='replace')):
+            name = short_table_name(table.name)
+            if name == key or ('.' not in key and name.split('.')[-1] == key):
+                return table
+        return None
+
+    def _read_statements(self, entry):
+        """Read the statements of an entry, or None if the file no longer matches the hash"""
+        try:
+            with open(entry['path'], 'rb') as f:
+                parts = []
+                for offset, length in entry['statements']:
+                    f.seek(offset)
+                    parts.append(f.read(length))
+        except OSError:
+            return None
+
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part)
+        if digest.hexdigest() != entry['hash']:
+            return None
+        # Statements are separated so an unterminated one does not swallow the next
+        return b';\n'.join(parts)
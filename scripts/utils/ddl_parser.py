@@ -0,0 +1,549 @@
+"""
+Tokenizer based DDL parser.
+
+The DDL text is cut into statements and each CREATE statement into tokens by compiled regular
+expressions, and the tokens are consumed in one linear pass. Quoted identifiers, string
+literals ('...' and $$...$$), nested parentheses, comments (--, // and /* */), default
+expressions and inline or out-of-line constraints are all handled at the token level, so
+commas or keywords inside them never split or end a column definition.
+
+Tokens are plain strings: quoted identifiers and string literals keep their quotes, so a token
+can be compared directly against punctuation or upper-cased against keywords.
+"""
+import mmap
+import os
+import re
+import sys
+from collections import namedtuple
+from functools import lru_cache
+from types import MappingProxyType
+
+# Files at least this large are looked up in scan mode instead of being parsed completely
+MMAP_SCAN_THRESHOLD = 64 * 1024 * 1024
+
+Column = namedtuple('Column', ['name', 'data_type', 'definition'])
+TableDefinition = namedtuple('TableDefinition', ['name', 'columns', 'unique_keys', 'primary_keys'])
+
+_COMMENT = r'--[^\n]*|//[^\n]*|/\*.*?(?:\*/|\Z)'
+_QUOTED = r'"(?:[^"]|"")*"|`[^`]*`'
+_STRING = r"'(?:[^'\\]|\\.|'')*'|\$\$.*?(?:\$\$|\Z)"
+
+# Everything up to and including the next ';' that is not inside a string, identifier or comment;
+# unterminated quotes fall back to single characters so the match never backtracks
+_STATEMENT_PATTERN = re.compile(
+    r"(?:[^;'\"`$/-]+|" + _STRING + '|' + _QUOTED + '|' + _COMMENT + r"|[$/\-'\"`])*(?:;|\Z)",
+    re.DOTALL
+)
+# One token, preceded by any whitespace and comments; the empty match at the end absorbs a
+# trailing comment
+_TOKEN_PATTERN = re.compile(
+    r'(?:\s+|' + _COMMENT + r')*(' + _QUOTED + '|' + _STRING + r'|[\w$]+|\S|\Z)',
+    re.DOTALL
+)
+_QUOTE_CHARACTERS = re.compile(r'[\'"`]|\$\$')
+_CREATE_PATTERN = re.compile(r'(?:\s+|' + _COMMENT + r')*CREATE\b', re.DOTALL | re.IGNORECASE)
+
+_TABLE_MODIFIERS = {'OR', 'REPLACE', 'LOCAL', 'GLOBAL', 'TEMP', 'TEMPORARY', 'VOLATILE', 'TRANSIENT'}
+_CONSTRAINT_KEYWORDS = {'CONSTRAINT', 'PRIMARY', 'UNIQUE', 'FOREIGN', 'CHECK'}
+# Keywords that end the data type of a column definition
+_TYPE_TERMINATORS = {
+    'NOT', 'NULL', 'DEFAULT', 'PRIMARY', 'UNIQUE', 'CONSTRAINT', 'REFERENCES', 'FOREIGN', 'CHECK',
+    'COLLATE', 'COMMENT', 'AUTOINCREMENT', 'AUTO_INCREMENT', 'IDENTITY', 'AS', 'MASKING', 'TAG'
+}
+
+
+def tokenize(text):
+    """Split SQL text into tokens, dropping whitespace and comments"""
+    tokens = _TOKEN_PATTERN.findall(text)
+    while tokens and not tokens[-1]:
+        tokens.pop()
+    return tokens
+
+
+def _is_identifier(token):
+    """Whether a token is an unquoted word or a quoted identifier"""
+    first = token[0]
+    return first.isalnum() or first in '_"`' or (first == '$' and not token.startswith('$$'))
+
+
+def _identifier(token):
+    """Identifier text without quotes"""
+    if token[0] == '"':
+        return token[1:-1].replace('""', '"')
+    if token[0] == '`':
+        return token[1:-1]
+    return token
+
+
+def iter_create_statements(text):
+    """
+    Yield (start, end, tokens) for every CREATE statement in the text
+
+    Statements end at a top-level ';'. A CREATE statement that is not terminated is also
+    cut at the next top-level CREATE; the pieces share the character span of the enclosing
+    text. Other statements are skipped without being tokenized.
+    """
+    position = 0
+    length = len(text)
+    while position < length:
+        match = _STATEMENT_PATTERN.match(text, position)
+        end = match.end()
+        if end == position:
+            break
+        if _CREATE_PATTERN.match(text, position):
+            tokens = tokenize(text[position:end])
+            if tokens and tokens[-1] == ';':
+                tokens.pop()
+            start = 0
+            depth = 0
+            for index, token in enumerate(tokens):
+                if token == '(':
+                    depth += 1
+                elif token == ')':
+                    depth -= 1
+                elif depth == 0 and index > start and token.upper() == 'CREATE':
+                    yield position, end, tokens[start:index]
+                    start = index
+            yield position, end, tokens[start:]
+        position = end
+
+
+def _read_name(tokens, index):
+    """Read a dotted object name starting at index, returning (parts, next index)"""
+    parts = []
+    while index < len(tokens) and _is_identifier(tokens[index]):
+        parts.append(_identifier(tokens[index]))
+        index += 1
+        if index < len(tokens) and tokens[index] == '.':
+            index += 1
+        else:
+            break
+    return parts, index
+
+
+def _split_items(tokens, index):
+    """
+    Split the parenthesised list starting at tokens[index] == '(' on top-level commas
+
+    Returns:
+        list: Token lists, one per item
+    """
+    items = []
+    start = index + 1
+    depth = 0
+    for position in range(index, len(tokens)):
+        token = tokens[position]
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+            if depth == 0:
+                items.append(tokens[start:position])
+                break
+        elif token == ',' and depth == 1:
+            items.append(tokens[start:position])
+            start = position + 1
+    else:
+        items.append(tokens[start:])
+    return items
+
+
+def _column_list(tokens, index):
+    """Read the identifiers of the first parenthesised column list at or after index"""
+    while index < len(tokens) and tokens[index] != '(':
+        index += 1
+    if index == len(tokens):
+        return []
+    # Each item is a column, optionally followed by ASC/DESC or a length
+    return [_identifier(item[0]) for item in _split_items(tokens, index)
+            if item and _is_identifier(item[0])]
+
+
+def render(tokens):
+    """Render tokens back into normalised SQL text; arguments are joined without spaces, as in NUMBER(38,0)"""
+    if len(tokens) == 1:
+        return tokens[0]
+    text = ' '.join(tokens)
+    if not _QUOTE_CHARACTERS.search(text):
+        return (text.replace(' (', '(').replace('( ', '(').replace(' )', ')')
+                .replace(' ,', ',').replace(', ', ',').replace(' .', '.').replace('. ', '.'))
+
+    # Strings and quoted identifiers may contain spaces and brackets, so space token by token
+    parts = []
+    previous = None
+    for token in tokens:
+        if previous is not None and token not in ('(', ')', ',', '.') and previous not in ('(', ',', '.'):
+            parts.append(' ')
+        parts.append(token)
+        previous = token
+    return ''.join(parts)
+
+
+def _parse_constraint(item, unique_keys, primary_keys):
+    """Collect the key columns of an out-of-line constraint"""
+    index = 0
+    if item[0].upper() == 'CONSTRAINT':
+        # CONSTRAINT <name> <constraint>
+        index = 2
+    keyword = item[index].upper() if index < len(item) else None
+    if keyword == 'PRIMARY':
+        primary_keys.extend(_column_list(item, index))
+    elif keyword == 'UNIQUE':
+        unique_keys.extend(_column_list(item, index))
+
+
+def _parse_column(item, unique_keys, primary_keys):
+    """Parse a column definition, collecting inline key constraints"""
+    name = sys.intern(_identifier(item[0]))
+    rest = item[1:]
+
+    type_end = None
+    depth = 0
+    for position, token in enumerate(rest):
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+        elif depth == 0:
+            keyword = token.upper()
+            if type_end is None and (
+                    keyword in _TYPE_TERMINATORS or
+                    (keyword == 'WITH' and position + 1 < len(rest) and
+                     rest[position + 1].upper() in ('MASKING', 'TAG'))):
+                type_end = position
+            if keyword == 'UNIQUE':
+                unique_keys.append(name)
+            elif keyword == 'PRIMARY' and position + 1 < len(rest) and rest[position + 1].upper() == 'KEY':
+                primary_keys.append(name)
+
+    definition = render(rest)
+    data_type = definition if type_end is None else render(rest[:type_end])
+    return Column(name, data_type, definition)
+
+
+def _is_constraint(item):
+    """Whether a table element is a constraint or index rather than a column"""
+    keyword = item[0].upper()
+    if keyword in _CONSTRAINT_KEYWORDS:
+        return True
+    # MySQL style KEY/INDEX <name> (<columns>)
+    if keyword in ('KEY', 'INDEX'):
+        return '(' in item[1:3]
+    return False
+
+
+def parse_create_statement(tokens):
+    """
+    Parse the tokens of one CREATE statement
+
+    Returns:
+        TableDefinition for CREATE TABLE, ('index', table_name, columns) for CREATE UNIQUE INDEX,
+        or None for anything else
+    """
+    index = 1
+    while index < len(tokens) and tokens[index].upper() in _TABLE_MODIFIERS:
+        index += 1
+    if index >= len(tokens):
+        return None
+
+    keyword = tokens[index].upper()
+    if keyword == 'UNIQUE' and index + 1 < len(tokens) and tokens[index + 1].upper() == 'INDEX':
+        # CREATE UNIQUE INDEX <name> ON <table> (<columns>)
+        position = index + 2
+        while position < len(tokens) and tokens[position].upper() != 'ON':
+            position += 1
+        table_parts, position = _read_name(tokens, position + 1)
+        if not table_parts:
+            return None
+        return ('index', '.'.join(table_parts).upper(), _column_list(tokens, position))
+
+    if keyword != 'TABLE':
+        return None
+    index += 1
+    if [token.upper() for token in tokens[index:index + 3]] == ['IF', 'NOT', 'EXISTS']:
+        index += 3
+
+    name_parts, index = _read_name(tokens, index)
+    if not name_parts or index >= len(tokens) or tokens[index] != '(':
+        # CREATE TABLE ... AS SELECT / LIKE / CLONE have no column list
+        return None
+
+    columns = []
+    unique_keys = []
+    primary_keys = []
+    for item in _split_items(tokens, index):
+        if not item:
+            continue
+        if _is_constraint(item):
+            _parse_constraint(item, unique_keys, primary_keys)
+        elif _is_identifier(item[0]):
+            columns.append(_parse_column(item, unique_keys, primary_keys))
+
+    columns = tuple(columns)
+    return TableDefinition(
+        '.'.join(name_parts).upper(),
+        columns,
+        _valid_keys(unique_keys, columns),
+        _valid_keys(primary_keys, columns)
+    )
+
+
+def _valid_keys(keys, columns):
+    """Key columns without duplicates, keeping only those that are columns of the table"""
+    column_names = {column.name for column in columns}
+    return tuple(key for key in dict.fromkeys(keys) if key in column_names)
+
+
+def _table_matches(table_name, reference):
+    """Whether a possibly shorter qualified reference names the table"""
+    return table_name == reference or table_name.endswith('.' + reference)
+
+
+def parse_ddl(text):
+    """
+    Parse every CREATE TABLE statement in the DDL text
+
+    Unique indexes created with CREATE UNIQUE INDEX are added to the unique keys of their table.
+
+    Returns:
+        list: TableDefinition tuples in file order
+    """
+    tables = []
+    unique_indexes = []
+    for _, _, statement in iter_create_statements(text):
+        result = parse_create_statement(statement)
+        if isinstance(result, TableDefinition):
+            tables.append(result)
+        elif result:
+            unique_indexes.append(result)
+
+    for _, reference, index_columns in unique_indexes:
+        for position, table in enumerate(tables):
+            if _table_matches(table.name, reference) or _table_matches(reference, table.name):
+                tables[position] = table._replace(
+                    unique_keys=_valid_keys(table.unique_keys + tuple(index_columns), table.columns)
+                )
+                break
+
+    return tables
+
+
+def short_table_name(table_name):
+    """SCHEMA.TABLE part of a qualified table name"""
+    return '.'.join(table_name.split('.')[-2:])
+
+
+@lru_cache(maxsize=128)
+def _load_ddl_file(path, mtime_ns, size):
+    """Parse a DDL file; the modification time and size are part of the cache key"""
+    with open(path, 'r') as f:
+        return tuple(parse_ddl(f.read()))
+
+
+def load_ddl_file(ddl_path):
+    """
+    Parse a DDL file, reusing the previous result while the file is unchanged
+
+    Results are cached by (path, mtime, size), so the same DDL is parsed once per run no matter
+    how many generators read it.
+
+    Returns:
+        tuple: TableDefinition tuples in file order
+    """
+    stat = os.stat(ddl_path)
+    return _load_ddl_file(os.path.abspath(ddl_path), stat.st_mtime_ns, stat.st_size)
+
+
+def table_key(table_name):
+    """SCHEMA.TABLE lookup key of a table name, ignoring quotes and case"""
+    return short_table_name(table_name.replace('"', '').replace('`', '').upper())
+
+
+@lru_cache(maxsize=128)
+def _load_ddl_index(path, mtime_ns, size):
+    """Index the tables of a DDL file by SCHEMA.TABLE; the first definition of a name wins"""
+    index = {}
+    for table in _load_ddl_file(path, mtime_ns, size):
+        index.setdefault(short_table_name(table.name), table)
+    return MappingProxyType(index)
+
+
+def load_ddl_index(ddl_path):
+    """
+    Index the tables of a DDL file, such as a GET_DDL export of a whole schema, by SCHEMA.TABLE
+
+    Returns:
+        Mapping: Read-only mapping of upper-cased SCHEMA.TABLE to TableDefinition
+    """
+    stat = os.stat(ddl_path)
+    return _load_ddl_index(os.path.abspath(ddl_path), stat.st_mtime_ns, stat.st_size)
+
+
+def find_table_definition(ddl_path, table_name):
+    """
+    Look up a table in a DDL file
+
+    Args:
+        ddl_path (str): DDL file with one or more CREATE TABLE statements
+        table_name (str): SCHEMA.TABLE, DATABASE.SCHEMA.TABLE or a bare table name
+
+    Returns:
+        TableDefinition or None if the file does not define the table
+    """
+    if os.path.getsize(ddl_path) >= MMAP_SCAN_THRESHOLD:
+        return _find_scanned_table(ddl_path, table_name)
+
+    index = load_ddl_index(ddl_path)
+    key = _match_key(index, table_key(table_name))
+    return index[key] if key else None
+
+
+def get_table_names(ddl_path):
+    """
+    List the tables defined in a DDL file
+
+    Returns:
+        list: Upper-cased SCHEMA.TABLE names in file order
+    """
+    if os.path.getsize(ddl_path) >= MMAP_SCAN_THRESHOLD:
+        return list(scan_ddl_file(ddl_path))
+    return list(load_ddl_index(ddl_path))
+
+
+def _match_key(index, key):
+    """Key of index matching a lookup key; a bare table name matches when exactly one schema defines it"""
+    if key in index:
+        return key
+    if '.' not in key:
+        matches = [name for name in index if name.split('.')[-1] == key]
+        if len(matches) == 1:
+            return matches[0]
+    return None
+
+
+def get_table_definition(ddl_path, table_name=None):
+    """
+    Return the definition of a table in a DDL file
+
+    Without a table name, or when a single table DDL names the table differently, the first
+    table of the file is returned.
+
+    Raises:
+        ValueError: If the file has no usable CREATE TABLE statement or does not define the table
+    """
+    if os.path.getsize(ddl_path) >= MMAP_SCAN_THRESHOLD:
+        return _get_scanned_table(ddl_path, table_name)
+
+    tables = load_ddl_file(ddl_path)
+    if not tables:
+        raise ValueError("Could not find column definitions in DDL file")
+    if not table_name:
+        return tables[0]
+
+    table = find_table_definition(ddl_path, table_name)
+    if table is None:
+        if len(tables) == 1:
+            return tables[0]
+        raise ValueError(f"Table {table_name} not found in DDL file {ddl_path}")
+    return table
+
+
+# Scan mode for very large DDL dumps: the file is memory-mapped, statement boundaries are found
+# with byte patterns and only the statements of requested tables are decoded and parsed.
+_NAME_BYTES = rb'(?:"(?:[^"]|"")*"|`[^`]*`|[\w$]+)(?:\s*\.\s*(?:"(?:[^"]|"")*"|`[^`]*`|[\w$]+))*'
+# Statements are expected to start on their own line, as in GET_DDL exports
+_STATEMENT_START_BYTES = re.compile(rb'^[ \t]*CREATE\b', re.IGNORECASE | re.MULTILINE)
+_CREATE_TABLE_BYTES = re.compile(
+    rb'[ \t]*CREATE\s+(?:(?:OR\s+REPLACE|LOCAL|GLOBAL|TEMP|TEMPORARY|VOLATILE|TRANSIENT)\s+)*TABLE\s+'
+    rb'(?:IF\s+NOT\s+EXISTS\s+)?(' + _NAME_BYTES + rb')\s*\(',
+    re.IGNORECASE
+)
+_CREATE_UNIQUE_INDEX_BYTES = re.compile(
+    rb'[ \t]*CREATE\s+UNIQUE\s+INDEX\s+\S+\s+ON\s+(' + _NAME_BYTES + rb')',
+    re.IGNORECASE
+)
+
+
+def _scanned_name_key(raw_name):
+    """Lookup key of a table name matched in the raw bytes"""
+    return table_key(re.sub(r'\s*\.\s*', '.', raw_name.decode('utf-8', errors='replace')))
+
+
+@lru_cache(maxsize=32)
+def _scan_ddl_file(path, mtime_ns, size):
+    """Locate the statements of every table; the modification time and size are part of the cache key"""
+    spans = {}
+    index_spans = []
+    if size:
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            starts = [match.start() for match in _STATEMENT_START_BYTES.finditer(mapped)]
+            starts.append(len(mapped))
+            for start, end in zip(starts, starts[1:]):
+                match = _CREATE_TABLE_BYTES.match(mapped, start)
+                if match:
+                    # The first definition of a name wins
+                    spans.setdefault(_scanned_name_key(match.group(1)), [(start, end - start)])
+                    continue
+                match = _CREATE_UNIQUE_INDEX_BYTES.match(mapped, start)
+                if match:
+                    index_spans.append((_scanned_name_key(match.group(1)), (start, end - start)))
+
+    for reference, span in index_spans:
+        for name, table_spans in spans.items():
+            if name == reference or name.endswith('.' + reference):
+                table_spans.append(span)
+                break
+
+    return MappingProxyType({name: tuple(table_spans) for name, table_spans in spans.items()})
+
+
+def scan_ddl_file(ddl_path):
+    """
+    Locate the statements of every table in a DDL file without loading it into memory
+
+    Returns:
+        Mapping: SCHEMA.TABLE -> tuple of (offset, length) byte spans, the CREATE TABLE
+        statement first followed by its CREATE UNIQUE INDEX statements
+    """
+    stat = os.stat(ddl_path)
+    return _scan_ddl_file(os.path.abspath(ddl_path), stat.st_mtime_ns, stat.st_size)
+
+
+def read_ddl_statements(ddl_path, statements):
+    """Read (offset, length) byte spans of a DDL file and decode them as one DDL text"""
+    with open(ddl_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        parts = [mapped[offset:offset + length] for offset, length in statements]
+    # Statements are separated so an unterminated one does not swallow the next
+    return b';\n'.join(parts).decode('utf-8', errors='replace')
+
+
+@lru_cache(maxsize=256)
+def _load_scanned_table(path, mtime_ns, size, key):
+    """Parse only the statements of one table of a scanned DDL file"""
+    statements = _scan_ddl_file(path, mtime_ns, size)[key]
+    for table in parse_ddl(read_ddl_statements(path, statements)):
+        if short_table_name(table.name) == key:
+            return table
+    return None
+
+
+def _find_scanned_table(ddl_path, table_name):
+    """find_table_definition() for files handled in scan mode"""
+    stat = os.stat(ddl_path)
+    path = os.path.abspath(ddl_path)
+    key = _match_key(_scan_ddl_file(path, stat.st_mtime_ns, stat.st_size), table_key(table_name))
+    return _load_scanned_table(path, stat.st_mtime_ns, stat.st_size, key) if key else None
+
+
+def _get_scanned_table(ddl_path, table_name=None):
+    """get_table_definition() for files handled in scan mode"""
+    index = scan_ddl_file(ddl_path)
+    if not index:
+        raise ValueError("Could not find column definitions in DDL file")
+
+    table = _find_scanned_table(ddl_path, table_name) if table_name else None
+    if table is None and (not table_name or len(index) == 1):
+        table = _find_scanned_table(ddl_path, next(iter(index)))
+    if table is None:
+        raise ValueError(f"Table {table_name} not found in DDL file {ddl_path}")
+    return table
@@ -1,6 +1,12 @@
 from openpyxl import load_workbook
 import openpyxl
 
+# Parameters read from the Snowflake Configuration section of the Config sheet
+CONFIG_SHEET_PARAMS = [
+    'ROLE', 'WAREHOUSE', 'DATABASE', 'ACCOUNT', 'USER', 'AUTHENTICATOR',
+    'METADATA_BACKEND', 'METADATA_PATH', 'METADATA_MAX_CONCURRENCY', 'METADATA_QUERY_TIMEOUT'
+]
+
 def get_config_from_sheet(config_sheet):
     """Extract Snowflake configuration from Config sheet"""
     config = {}
@@ -12,7 +18,7 @@ def get_config_from_sheet(config_sheet):
         if param == 'Snowflake Configuration':
             in_snowflake_section = True
             continue
-        if in_snowflake_section and param in ['ROLE', 'WAREHOUSE', 'DATABASE', 'ACCOUNT', 'USER', 'AUTHENTICATOR']:
+        if in_snowflake_section and param in CONFIG_SHEET_PARAMS:
             value = config_sheet.cell(row=row, column=2).value
             if value:
                 config[param] = value
@@ -30,4 +36,22 @@ def get_table_info_from_sheet(mapping_sheet):
             source_table = mapping_sheet.cell(row=row, column=2).value
         if target_table and source_table:
             break
-    return target_table, source_table 
\ No newline at end of file
+    return target_table, source_table 
+
+def get_mapping_header_value(mapping_sheet, param, default=None):
+    """Get the value of a header option (e.g. UNIQUE_KEY) from the rows above the column mappings"""
+    for row in range(1, mapping_sheet.max_row + 1):
+        cell_value = mapping_sheet.cell(row=row, column=1).value
+        # Header options always come before the column mapping header
+        if cell_value == 'S.NO':
+            break
+        if cell_value == param:
+            value = mapping_sheet.cell(row=row, column=2).value
+            return value if value not in (None, '') else default
+    return default
+
+
+def is_mapping_option_enabled(mapping_sheet, param):
+    """Check whether a Y/N header option is set to Y"""
+    value = get_mapping_header_value(mapping_sheet, param)
+    return str(value).strip().upper() == 'Y' if value is not None else False
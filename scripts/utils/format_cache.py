@@ -0,0 +1,88 @@
+"""
+On-disk cache of formatted SQL.
+
+Formatter output is stored in data/format_cache/, one file per entry, named by the sha256 of
+the formatter, its options and the unformatted SQL. A hit refreshes the file's modification
+time. When the cache grows past its entry limit, the least recently used files are removed,
+so regenerating unchanged macros never formats the same SQL twice.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+
+DEFAULT_FORMAT_CACHE_DIR = os.path.join('data', 'format_cache')
+DEFAULT_FORMAT_CACHE_ENTRIES = 1000
+_ENTRY_SUFFIX = '.sql'
+
+
+class FormatCache:
+    """Least recently used cache of formatter output, persisted as one file per entry"""
+
+    def __init__(self, directory=DEFAULT_FORMAT_CACHE_DIR, max_entries=DEFAULT_FORMAT_CACHE_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(sql, formatter, options=None):
+        """Hash of the unformatted SQL and the formatter with its options"""
+        digest = hashlib.sha256()
+        digest.update(json.dumps([formatter, options], sort_keys=True, default=str).encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(sql.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + _ENTRY_SUFFIX)
+
+    def get(self, key):
+        """Return the cached output for a key, or None"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                text = f.read()
+            # Mark the entry as recently used
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return text
+
+    def put(self, key, text):
+        """Store the output for a key and evict the least recently used entries"""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(key)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8', newline='') as f:
+                f.write(text)
+            os.replace(temp_path, path)
+            self._evict()
+        except OSError as e:
+            logging.warning(f"Could not write SQL format cache entry: {str(e)}")
+
+    def _evict(self):
+        with self._lock:
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(_ENTRY_SUFFIX)]
+            if len(entries) <= self.max_entries:
+                return
+            entries.sort(key=lambda entry: entry.stat().st_mtime_ns)
+            for entry in entries[:len(entries) - self.max_entries]:
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+    def get_or_format(self, sql, formatter, options, format_function):
+        """Return the cached output for sql, formatting and storing it on a miss"""
+        key = self.key(sql, formatter, options)
+        text = self.get(key)
+        if text is None:
+            text = format_function(sql)
+            self.put(key, text)
+        return text
@@ -0,0 +1,193 @@
+"""
+Unique key inference by profiling the source table.
+
+Runs a single query with COUNT(*) and APPROX_COUNT_DISTINCT over every candidate column and
+column pair on a sample of the source table to shortlist the candidates whose approximate
+distinct count matches the row count. The approximation cannot tell a unique column from one
+with a few duplicates, so the first MAX_CONFIRMED_CANDIDATES of the shortlist are confirmed with
+one exact COUNT(DISTINCT ...) per candidate in a single query over the whole table; the
+smallest candidate without duplicates is the key. Results are cached per table in
+data/key_profiles.json so each table is profiled only once.
+"""
+import datetime
+import json
+import logging
+import os
+import re
+from itertools import combinations
+
+from .snowflake_utils import get_snowflake_connection
+
+PROFILE_CACHE_PATH = os.path.join('data', 'key_profiles.json')
+DEFAULT_SAMPLE_ROWS = 100000
+MAX_CANDIDATE_COLUMNS = 8
+MAX_COMBINATION_SIZE = 2
+# APPROX_COUNT_DISTINCT (HyperLogLog) has an average relative error of about 1.6%; candidates
+# within this tolerance are only shortlisted and still need the exact check
+DISTINCT_TOLERANCE = 0.02
+# Shortlisted candidates confirmed by the exact query, which scans the whole table
+MAX_CONFIRMED_CANDIDATES = 4
+
+KEY_SUFFIXES = ('_CD', '_ID', '_KEY')
+SKIP_COLUMNS = ["List (Y,N)", "Table Type", "ref"]
+
+_COLUMN_REFERENCE = re.compile(r'^(?:(\w+)\.)?"?(\w+)"?$')
+
+
+def get_candidate_columns(column_mappings, main_table_alias='source'):
+    """
+    Pick the mapped columns worth profiling as key candidates
+
+    Only columns whose logic is a plain reference to a source column can be profiled against
+    the source table. Name pattern matches (_CD, _ID, _KEY) come first, then the remaining
+    columns in mapping order.
+
+    Returns:
+        list: (target_column, source_column) tuples
+    """
+    pattern_matches = []
+    others = []
+    for column in column_mappings:
+        target_col = str(column.target_column)
+        if target_col in SKIP_COLUMNS:
+            continue
+
+        match = _COLUMN_REFERENCE.match(str(column.logic).strip())
+        if not match or match.group(1) not in (None, main_table_alias, 'main'):
+            continue
+
+        candidate = (target_col, match.group(2))
+        if target_col.upper().endswith(KEY_SUFFIXES) or target_col.upper() in ('ID', 'KEY'):
+            pattern_matches.append(candidate)
+        else:
+            others.append(candidate)
+
+    return (pattern_matches + others)[:MAX_CANDIDATE_COLUMNS]
+
+
+def build_profile_query(table_ref, candidates, sample_rows=DEFAULT_SAMPLE_ROWS):
+    """
+    Build the profiling query
+
+    Returns:
+        tuple: (sql, combos) where combos lists the candidate tuples in select list order
+    """
+    combos = []
+    for size in range(1, MAX_COMBINATION_SIZE + 1):
+        combos.extend(combinations(candidates, size))
+
+    select_list = ["COUNT(*) AS ROW_CNT"]
+    for index, combo in enumerate(combos):
+        columns = ', '.join(source_col for _, source_col in combo)
+        select_list.append(f"APPROX_COUNT_DISTINCT({columns}) AS DISTINCT_{index}")
+
+    sample = f" SAMPLE ({int(sample_rows)} ROWS)" if sample_rows else ""
+    sql = "SELECT\n    " + ",\n    ".join(select_list) + f"\nFROM {table_ref}{sample}"
+    return sql, combos
+
+
+def shortlist_unique_keys(row_count, distinct_counts, combos):
+    """Return the combinations whose approximate distinct count matches the row count, smallest first"""
+    if not row_count:
+        return []
+    shortlist = [combo for combo, distinct_count in zip(combos, distinct_counts)
+                 if distinct_count >= row_count * (1 - DISTINCT_TOLERANCE)]
+    return shortlist[:MAX_CONFIRMED_CANDIDATES]
+
+
+def build_duplicate_count_query(table_ref, shortlist):
+    """Build the exact query counting the duplicate rows of each shortlisted combination over the whole table"""
+    # COUNT(DISTINCT ...) skips NULLs, so NULL keys count as duplicates, as they should for a MERGE
+    select_list = [
+        f"COUNT(*) - COUNT(DISTINCT {', '.join(source_col for _, source_col in combo)}) AS DUPLICATE_{index}"
+        for index, combo in enumerate(shortlist)
+    ]
+    return "SELECT\n    " + ",\n    ".join(select_list) + f"\nFROM {table_ref}"
+
+
+def confirm_unique_key(cursor, table_ref, shortlist):
+    """Return the target columns of the first shortlisted combination without duplicates, or []"""
+    if not shortlist:
+        return []
+    cursor.execute(build_duplicate_count_query(table_ref, shortlist))
+    duplicate_counts = cursor.fetchone()
+    for combo, duplicate_count in zip(shortlist, duplicate_counts):
+        unique_key = [target_col for target_col, _ in combo]
+        if duplicate_count == 0:
+            return unique_key
+        logging.info(f"Rejected key candidate {unique_key} for {table_ref}: {duplicate_count} duplicate rows")
+    return []
+
+
+def _load_cache(cache_path):
+    if not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(cache, cache_path):
+    os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+    with open(cache_path, 'w') as f:
+        json.dump(cache, f, indent=2)
+
+
+def profile_unique_key(snowflake_config, table_ref, column_mappings,
+                       sample_rows=DEFAULT_SAMPLE_ROWS, cache_path=PROFILE_CACHE_PATH):
+    """
+    Infer the unique key of a table by profiling it, reusing the cached result when available
+
+    Args:
+        snowflake_config (dict): Snowflake settings from the Config sheet
+        table_ref (str): Fully qualified source table (DATABASE.SCHEMA.TABLE)
+        column_mappings (list): ColumnMapping records
+        sample_rows (int): Rows to sample, or None to scan the whole table
+
+    Returns:
+        list: Target columns forming the unique key, or [] when no candidate is unique
+    """
+    candidates = get_candidate_columns(column_mappings)
+    if not candidates:
+        return []
+
+    cache_key = table_ref.upper()
+    cache = _load_cache(cache_path)
+    cached = cache.get(cache_key)
+    # The cached result is only valid for the same candidate columns, and entries written before
+    # keys were confirmed exactly may hold a column with duplicates
+    if (cached and cached.get('confirmed')
+            and cached.get('candidates') == [list(candidate) for candidate in candidates]):
+        logging.info(f"Using cached key profile for {cache_key}: {cached['unique_key']}")
+        return cached['unique_key']
+
+    sql, combos = build_profile_query(table_ref, candidates, sample_rows)
+
+    conn = get_snowflake_connection(snowflake_config, generator='key_profiler')
+    try:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql)
+            row = cursor.fetchone()
+            row_count, distinct_counts = row[0], list(row[1:])
+            shortlist = shortlist_unique_keys(row_count, distinct_counts, combos)
+            unique_key = confirm_unique_key(cursor, table_ref, shortlist)
+        finally:
+            cursor.close()
+    finally:
+        conn.close()
+
+    cache[cache_key] = {
+        'unique_key': unique_key,
+        'row_count': row_count,
+        'sample_rows': sample_rows,
+        'candidates': [list(candidate) for candidate in candidates],
+        'confirmed': True,
+        'profiled_at': datetime.datetime.now().isoformat(timespec='seconds')
+    }
+    _save_cache(cache, cache_path)
+
+    logging.info(f"Profiled unique key for {cache_key}: {unique_key}")
+    return unique_key
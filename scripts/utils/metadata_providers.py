@@ -0,0 +1,408 @@
+"""
+Metadata providers used to resolve table columns.
+
+Snowflake is the default backend. A local SQLite catalog or a schema snapshot file can
+be selected from the Config sheet (METADATA_BACKEND / METADATA_PATH) or the command line
+so the mapping and model generators can run offline against a known set of tables.
+"""
+import datetime
+import gzip
+import json
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from scripts.utils.snowflake_instrumentation import instrumented_connect
+
+DEFAULT_METADATA_BACKEND = 'SNOWFLAKE'
+DEFAULT_CATALOG_PATH = os.path.join('data', 'metadata_catalog.db')
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_QUERY_TIMEOUT = 120  # seconds
+# Version 2 stores each table's DATABASE, SCHEMA and TABLE as a list, so names containing a dot survive
+SNAPSHOT_VERSION = 2
+# Config sheet settings a Snowflake connection needs
+SNOWFLAKE_CONNECTION_SETTINGS = ('ACCOUNT', 'USER', 'AUTHENTICATOR', 'WAREHOUSE', 'ROLE')
+
+
+class MetadataProvider:
+    """Base interface for column metadata lookups"""
+
+    def get_table_columns(self, database, schema, table):
+        """Return [(COLUMN_NAME, DATA_TYPE), ...] for a table in ordinal order"""
+        raise NotImplementedError
+
+    def get_columns_for_tables(self, tables):
+        """
+        Get column metadata for several tables
+
+        Args:
+            tables (list): (DATABASE, SCHEMA, TABLE) tuples
+
+        Returns:
+            dict: Column rows keyed by the (DATABASE, SCHEMA, TABLE) tuple
+        """
+        return {table: self.get_table_columns(*table) for table in dict.fromkeys(tables)}
+
+    def get_schema_columns(self, database, schema=None):
+        """
+        Get column metadata for every table of a database or schema
+
+        Returns:
+            dict: Column rows keyed by the (DATABASE, SCHEMA, TABLE) tuple
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release any resources held by the provider"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class SnowflakeConnectionPool:
+    """Thread safe pool that opens up to max_size Snowflake connections on demand"""
+
+    def __init__(self, connect, max_size):
+        self._connect = connect
+        self._max_size = max_size
+        self._idle = queue.LifoQueue()
+        self._created = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Return an idle connection, opening a new one while below max_size"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = len(self._created) < self._max_size
+            if can_create:
+                # Reserve the slot before connecting so concurrent callers don't overshoot
+                self._created.append(None)
+
+        if not can_create:
+            return self._idle.get()
+
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._lock:
+                self._created.remove(None)
+            raise
+
+        with self._lock:
+            self._created[self._created.index(None)] = conn
+        return conn
+
+    def release(self, conn):
+        """Return a connection to the pool"""
+        self._idle.put(conn)
+
+    def close(self):
+        """Close every connection opened by the pool"""
+        with self._lock:
+            connections = [conn for conn in self._created if conn is not None]
+            self._created = []
+        for conn in connections:
+            conn.close()
+        self._idle = queue.LifoQueue()
+
+
+class SnowflakeMetadataProvider(MetadataProvider):
+    """Read column metadata from INFORMATION_SCHEMA over pooled Snowflake connections"""
+
+    def __init__(self, config, database=None, schema=None, generator='metadata'):
+        self.config = config
+        self.generator = generator
+        self.database = database or config.get('DATABASE')
+        self.schema = schema
+        self.max_concurrency = max(1, int(config.get('METADATA_MAX_CONCURRENCY') or DEFAULT_MAX_CONCURRENCY))
+        self.query_timeout = int(config.get('METADATA_QUERY_TIMEOUT') or DEFAULT_QUERY_TIMEOUT)
+        self._pool = SnowflakeConnectionPool(self._connect, self.max_concurrency)
+
+    def _connect(self):
+        """Open a new instrumented Snowflake connection"""
+        connect_args = {
+            'account': self.config['ACCOUNT'],
+            'user': self.config['USER'],
+            'authenticator': self.config['AUTHENTICATOR'],
+            'warehouse': self.config['WAREHOUSE'],
+            'role': self.config['ROLE'],
+            'database': self.database,
+            'schema': self.schema
+        }
+        if str(self.config['AUTHENTICATOR']).lower() == 'externalbrowser':
+            # Cache the SSO token so pooled connections don't each open a browser window
+            connect_args['client_store_temporary_credential'] = True
+
+        try:
+            return instrumented_connect(self.generator, **connect_args)
+        except Exception as e:
+            raise Exception(f"Failed to connect to Snowflake: {str(e)}")
+
+    def get_table_columns(self, database, schema, table):
+        conn = self._pool.acquire()
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"""
+                    SELECT COLUMN_NAME, DATA_TYPE
+                    FROM {database}.INFORMATION_SCHEMA.COLUMNS
+                    WHERE TABLE_SCHEMA = %s
+                    AND TABLE_NAME = %s
+                    ORDER BY ORDINAL_POSITION
+                """, (schema, table), timeout=self.query_timeout)
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+        finally:
+            self._pool.release(conn)
+
+    def get_columns_for_tables(self, tables):
+        """Fetch the tables concurrently, at most max_concurrency queries at a time"""
+        tables = list(dict.fromkeys(tables))
+        if len(tables) <= 1 or self.max_concurrency == 1:
+            return super().get_columns_for_tables(tables)
+
+        # Authenticate once up front so the workers reuse a warm connection/token
+        self._pool.release(self._pool.acquire())
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(tables))) as executor:
+            futures = {table: executor.submit(self.get_table_columns, *table) for table in tables}
+            for table, future in futures.items():
+                try:
+                    results[table] = future.result()
+                except Exception as e:
+                    raise Exception(f"Failed to fetch columns for {'.'.join(table)}: {str(e)}")
+        return results
+
+    def get_schema_columns(self, database, schema=None):
+        """Read a whole database or schema with a single INFORMATION_SCHEMA query"""
+        query = f"""
+            SELECT TABLE_SCHEMA, TABLE_NAME, COLUMN_NAME, DATA_TYPE
+            FROM {database}.INFORMATION_SCHEMA.COLUMNS
+            WHERE TABLE_SCHEMA <> 'INFORMATION_SCHEMA'
+        """
+        params = ()
+        if schema:
+            query += " AND TABLE_SCHEMA = %s"
+            params = (schema,)
+        query += " ORDER BY TABLE_SCHEMA, TABLE_NAME, ORDINAL_POSITION"
+
+        conn = self._pool.acquire()
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(query, params, timeout=self.query_timeout)
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+        finally:
+            self._pool.release(conn)
+
+        tables = {}
+        for table_schema, table_name, column_name, data_type in rows:
+            tables.setdefault((database, table_schema, table_name), []).append((column_name, data_type))
+        return tables
+
+    def close(self):
+        self._pool.close()
+
+
+class SQLiteMetadataProvider(MetadataProvider):
+    """Read column metadata from a local SQLite catalog"""
+
+    def __init__(self, path=DEFAULT_CATALOG_PATH):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS columns (
+                database_name TEXT NOT NULL,
+                schema_name TEXT NOT NULL,
+                table_name TEXT NOT NULL,
+                column_name TEXT NOT NULL,
+                ordinal_position INTEGER NOT NULL,
+                data_type TEXT
+            )
+        """)
+        self._conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_columns_table
+            ON columns (database_name, schema_name, table_name, ordinal_position)
+        """)
+
+    def get_table_columns(self, database, schema, table):
+        cursor = self._conn.execute("""
+            SELECT column_name, data_type
+            FROM columns
+            WHERE database_name = ? AND schema_name = ? AND table_name = ?
+            ORDER BY ordinal_position
+        """, (database.upper(), schema.upper(), table.upper()))
+        return cursor.fetchall()
+
+    def get_schema_columns(self, database, schema=None):
+        query = """
+            SELECT database_name, schema_name, table_name, column_name, data_type
+            FROM columns
+            WHERE database_name = ?
+        """
+        params = [database.upper()]
+        if schema:
+            query += " AND schema_name = ?"
+            params.append(schema.upper())
+        query += " ORDER BY schema_name, table_name, ordinal_position"
+
+        tables = {}
+        for database_name, schema_name, table_name, column_name, data_type in self._conn.execute(query, params):
+            tables.setdefault((database_name, schema_name, table_name), []).append((column_name, data_type))
+        return tables
+
+    def add_table(self, database, schema, table, columns):
+        """Replace the catalog entry of a table
+
+        Args:
+            columns (list): Column names or (COLUMN_NAME, DATA_TYPE) tuples in ordinal order
+        """
+        key = (database.upper(), schema.upper(), table.upper())
+        rows = []
+        for position, column in enumerate(columns, start=1):
+            name, data_type = (column, None) if isinstance(column, str) else (column[0], column[1])
+            rows.append(key + (name, position, data_type))
+
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM columns WHERE database_name = ? AND schema_name = ? AND table_name = ?",
+                key
+            )
+            self._conn.executemany("""
+                INSERT INTO columns (database_name, schema_name, table_name, column_name, ordinal_position, data_type)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, rows)
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class SnapshotMetadataProvider(MetadataProvider):
+    """Read column metadata from a snapshot file written by export_snapshot()"""
+
+    def __init__(self, path):
+        self.path = path
+        self.tables = load_snapshot(path)
+
+    def get_table_columns(self, database, schema, table):
+        return self.tables.get((database.upper(), schema.upper(), table.upper()), [])
+
+    def get_schema_columns(self, database, schema=None):
+        return {
+            key: columns for key, columns in self.tables.items()
+            if key[0] == database.upper() and (not schema or key[1] == schema.upper())
+        }
+
+
+def export_snapshot(provider, path, database, schema=None):
+    """
+    Dump the column metadata of a database or schema into a gzip compressed snapshot file
+
+    Returns:
+        int: Number of tables written
+    """
+    tables = provider.get_schema_columns(database, schema)
+    snapshot = {
+        'version': SNAPSHOT_VERSION,
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'database': database.upper(),
+        'schema': schema.upper() if schema else None,
+        # One entry per table: [[DATABASE, SCHEMA, TABLE], [[COLUMN_NAME, DATA_TYPE], ...]]
+        'tables': [
+            [[part.upper() for part in key], [[name, data_type] for name, data_type in columns]]
+            for key, columns in tables.items()
+        ]
+    }
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        json.dump(snapshot, f, separators=(',', ':'))
+
+    return len(tables)
+
+
+def load_snapshot(path):
+    """
+    Load a snapshot file
+
+    Returns:
+        dict: Column rows keyed by the upper case (DATABASE, SCHEMA, TABLE) tuple
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        snapshot = json.load(f)
+
+    version = snapshot.get('version')
+    if version == 1:
+        # Version 1 keyed tables by "DATABASE.SCHEMA.TABLE"
+        entries = [(table_name.split('.', 2), columns) for table_name, columns in snapshot['tables'].items()]
+    elif version == SNAPSHOT_VERSION:
+        entries = snapshot['tables']
+    else:
+        raise ValueError(f"Unsupported snapshot version in {path}: {version}")
+
+    tables = {}
+    for key, columns in entries:
+        tables[tuple(key)] = [tuple(column) for column in columns]
+    return tables
+
+
+def import_snapshot(path, catalog_path=DEFAULT_CATALOG_PATH):
+    """
+    Load a snapshot file into the local SQLite catalog
+
+    Returns:
+        int: Number of tables imported
+    """
+    tables = load_snapshot(path)
+    with SQLiteMetadataProvider(catalog_path) as catalog:
+        for (database, schema, table), columns in tables.items():
+            catalog.add_table(database, schema, table, columns)
+    return len(tables)
+
+
+def get_metadata_provider(config, backend=None, path=None, database=None, schema=None, generator='metadata'):
+    """
+    Create the metadata provider selected by the caller or the Config sheet
+
+    Args:
+        config (dict): Values from the Config sheet (Snowflake connection and METADATA_* keys)
+        backend (str): Overrides METADATA_BACKEND: SNOWFLAKE, SQLITE or SNAPSHOT
+        path (str): Overrides METADATA_PATH for file based backends
+        database (str): Database for the Snowflake session
+        schema (str): Schema for the Snowflake session
+        generator (str): Name recorded with each Snowflake call for instrumentation
+
+    Returns:
+        MetadataProvider: Provider for the selected backend
+    """
+    backend = (backend or config.get('METADATA_BACKEND') or DEFAULT_METADATA_BACKEND).strip().upper()
+    path = path or config.get('METADATA_PATH')
+
+    if backend == 'SNOWFLAKE':
+        return SnowflakeMetadataProvider(config, database=database, schema=schema, generator=generator)
+    if backend == 'SQLITE':
+        return SQLiteMetadataProvider(path or DEFAULT_CATALOG_PATH)
+    if backend == 'SNAPSHOT':
+        if not path:
+            raise ValueError("METADATA_PATH must point to a snapshot file for the SNAPSHOT backend")
+        return SnapshotMetadataProvider(path)
+
+    raise ValueError(f"Unsupported metadata backend: {backend}")
@@ -0,0 +1,173 @@
+"""
+Instrumentation for Snowflake calls.
+
+Every connect, execute and fetch made through instrumented_connect() is recorded with
+its latency, rows returned, query id and the generator that issued it, so a run can
+report how much of its time was spent waiting on the warehouse.
+"""
+import logging
+import threading
+import time
+from collections import namedtuple
+
+SnowflakeCall = namedtuple('SnowflakeCall', ['generator', 'operation', 'elapsed', 'rows', 'query_id'])
+
+
+class SnowflakeInstrumentation:
+    """Thread safe collector of Snowflake call records"""
+
+    def __init__(self):
+        self._calls = []
+        self._lock = threading.Lock()
+
+    def record(self, generator, operation, elapsed, rows=0, query_id=None):
+        """Record a single Snowflake call"""
+        call = SnowflakeCall(generator, operation, elapsed, rows, query_id)
+        with self._lock:
+            self._calls.append(call)
+        logging.debug(
+            f"Snowflake {operation} by {generator}: {elapsed:.3f}s, {rows} rows"
+            + (f", query id {query_id}" if query_id else "")
+        )
+
+    def reset(self):
+        """Forget all recorded calls, typically at the start of a run"""
+        with self._lock:
+            self._calls = []
+
+    def calls(self):
+        """Return a copy of the recorded calls"""
+        with self._lock:
+            return list(self._calls)
+
+    def summary(self):
+        """
+        Aggregate the recorded calls
+
+        Returns:
+            dict: Totals with 'queries', 'rows', 'elapsed', and per 'operations' and 'generators' timings
+        """
+        calls = self.calls()
+        summary = {
+            'queries': sum(1 for call in calls if call.operation == 'execute'),
+            'rows': sum(call.rows for call in calls if call.operation == 'fetch'),
+            'elapsed': sum(call.elapsed for call in calls),
+            'operations': {},
+            'generators': {}
+        }
+        for call in calls:
+            summary['operations'][call.operation] = summary['operations'].get(call.operation, 0) + call.elapsed
+            summary['generators'][call.generator] = summary['generators'].get(call.generator, 0) + call.elapsed
+        return summary
+
+    def format_summary(self):
+        """One line summary suitable for the status bar, or '' when nothing was recorded"""
+        summary = self.summary()
+        if not summary['operations']:
+            return ''
+        operations = ', '.join(
+            f"{operation} {elapsed:.2f}s" for operation, elapsed in summary['operations'].items()
+        )
+        return (
+            f"Snowflake: {summary['queries']} queries, {summary['rows']} rows, "
+            f"{summary['elapsed']:.2f}s waiting ({operations})"
+        )
+
+    def log_summary(self, logger=None):
+        """Log the run summary including the time spent per generator"""
+        logger = logger or logging.getLogger()
+        line = self.format_summary()
+        if not line:
+            return
+        logger.info(line)
+        for generator, elapsed in self.summary()['generators'].items():
+            logger.info(f"  {generator}: {elapsed:.2f}s")
+
+
+# Shared collector for the whole application
+instrumentation = SnowflakeInstrumentation()
+
+
+class InstrumentedCursor:
+    """Cursor wrapper that records execute and fetch calls"""
+
+    def __init__(self, cursor, generator):
+        self._cursor = cursor
+        self._generator = generator
+
+    def execute(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cursor.execute(*args, **kwargs)
+        finally:
+            instrumentation.record(
+                self._generator,
+                'execute',
+                time.perf_counter() - start,
+                query_id=getattr(self._cursor, 'sfqid', None)
+            )
+
+    def _timed_fetch(self, fetch, *args, **kwargs):
+        start = time.perf_counter()
+        result = fetch(*args, **kwargs)
+        if result is None:
+            rows = 0
+        elif isinstance(result, list):
+            rows = len(result)
+        else:
+            rows = 1
+        instrumentation.record(
+            self._generator,
+            'fetch',
+            time.perf_counter() - start,
+            rows=rows,
+            query_id=getattr(self._cursor, 'sfqid', None)
+        )
+        return result
+
+    def fetchall(self):
+        return self._timed_fetch(self._cursor.fetchall)
+
+    def fetchmany(self, *args, **kwargs):
+        return self._timed_fetch(self._cursor.fetchmany, *args, **kwargs)
+
+    def fetchone(self):
+        return self._timed_fetch(self._cursor.fetchone)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedConnection:
+    """Connection wrapper whose cursors record their calls"""
+
+    def __init__(self, conn, generator):
+        self._conn = conn
+        self._generator = generator
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs), self._generator)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def instrumented_connect(generator, **connect_args):
+    """
+    Open a Snowflake connection whose calls are recorded
+
+    Args:
+        generator (str): Name of the generator issuing the calls
+        **connect_args: Arguments for snowflake.connector.connect
+
+    Returns:
+        InstrumentedConnection: Wrapped Snowflake connection
+    """
+    import snowflake.connector
+
+    start = time.perf_counter()
+    try:
+        conn = snowflake.connector.connect(**connect_args)
+    finally:
+        instrumentation.record(generator, 'connect', time.perf_counter() - start)
+    return InstrumentedConnection(conn, generator)
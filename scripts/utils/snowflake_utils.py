@@ -1,9 +1,10 @@
-import snowflake.connector
+from .snowflake_instrumentation import instrumented_connect
 
-def get_snowflake_connection(config):
-    """Create Snowflake connection from config"""
+def get_snowflake_connection(config, generator='snowflake_utils'):
+    """Create an instrumented Snowflake connection from config"""
     try:
-        return snowflake.connector.connect(
+        return instrumented_connect(
+            generator,
             account=config['ACCOUNT'],
             user=config['USER'],
             authenticator=config['AUTHENTICATOR'],
@@ -16,6 +17,7 @@ def get_snowflake_connection(config):
 
 def get_table_columns(conn, database, schema, table):
     """Get column information for a table"""
+    cursor = None
     try:
         cursor = conn.cursor()
         cursor.execute(f"""
@@ -28,4 +30,4 @@ def get_table_columns(conn, database, schema, table):
         return cursor.fetchall()
     finally:
         if cursor:
-            cursor.close() 
\ No newline at end of file
+            cursor.close()
\ No newline at end of file
@@ -0,0 +1,88 @@
+"""
+Formatter for the SQL shapes the generators produce.
+
+MERGE and INSERT statements are assembled from known parts: a select list, FROM, joins,
+WHERE, GROUP BY and the MERGE clauses. The fast formatter lays them out directly from those
+parts, one item per line, in a single pass. sqlparse re-parses and re-indents the whole
+statement, which is slow and fails past its token limit on wide MERGE statements. It is kept as an
+optional fallback (SQL_FORMATTER = SQLPARSE in the mapping sheet), and its output is cached
+on disk by a hash of the unformatted SQL, see format_cache.py.
+"""
+import logging
+from functools import lru_cache
+
+from .format_cache import FormatCache
+
+try:
+    import sqlparse
+except ImportError:  # Only needed for the sqlparse fallback
+    sqlparse = None
+
+INDENT = '    '
+FAST_FORMATTER = 'fast'
+SQLPARSE_FORMATTER = 'sqlparse'
+SQL_FORMATTERS = (FAST_FORMATTER, SQLPARSE_FORMATTER)
+SQLPARSE_OPTIONS = {'reindent_aligned': True, 'indent_tabs': True, 'keyword_case': 'upper'}
+
+
+@lru_cache(maxsize=None)
+def get_format_cache():
+    """Shared on-disk cache of formatter output"""
+    return FormatCache()
+
+
+def get_sql_formatter(name=None):
+    """
+    Normalise a formatter name, defaulting to the fast formatter
+
+    Raises:
+        ValueError: If the name is not a known formatter
+    """
+    if not name:
+        return FAST_FORMATTER
+    formatter = str(name).strip().lower()
+    if formatter not in SQL_FORMATTERS:
+        raise ValueError(f"Unknown SQL formatter '{name}', expected one of {', '.join(SQL_FORMATTERS)}")
+    return formatter
+
+
+def format_list(items, indent=INDENT):
+    """Lay out items one per line, comma separated"""
+    return indent + f",\n{indent}".join(items)
+
+
+def format_select(select_items, from_clause, clauses=(), indent=''):
+    """Lay out a SELECT with one column per line, followed by the FROM and clause lines"""
+    lines = [f"{indent}SELECT"]
+    if select_items:
+        lines.append(format_list(select_items, indent + INDENT))
+    lines.append(f"{indent}FROM {from_clause}")
+    lines.extend(indent + clause for clause in clauses)
+    return '\n'.join(lines)
+
+
+def _sqlparse_format(sql):
+    try:
+        return sqlparse.format(sql, **SQLPARSE_OPTIONS)
+    except sqlparse.exceptions.SQLParseError as e:
+        # sqlparse 0.5+ refuses statements over its token limit (wide MERGE statements)
+        logging.warning(f"sqlparse could not format the statement, using the fast SQL formatter: {str(e)}")
+        return sql
+
+
+def format_sql(sql, formatter=FAST_FORMATTER, cache=None):
+    """
+    Finish SQL laid out with the functions above
+
+    The fast formatter leaves it as is. The sqlparse formatter re-indents it aligned, with
+    tabs and upper case keywords, and falls back to the fast layout if sqlparse fails; its
+    output is cached, in the shared format cache unless another cache is given.
+    """
+    if formatter != SQLPARSE_FORMATTER:
+        return sql
+    if sqlparse is None:
+        logging.warning("sqlparse is not installed, using the fast SQL formatter")
+        return sql
+    cache = cache or get_format_cache()
+    options = dict(SQLPARSE_OPTIONS, version=sqlparse.__version__)
+    return cache.get_or_format(sql, SQLPARSE_FORMATTER, options, _sqlparse_format)
@@ -0,0 +1,146 @@
+"""
+Precompiled templates for the generated artifacts.
+
+The dbt config block (one template per materialization), the model header, the MERGE and
+INSERT macros and the Airflow DAG files (one template per DAG type) are string.Template
+sources compiled once per name and cached. Rendering an artifact is a single substitute()
+call on values taken from the parsed configuration.
+"""
+from functools import lru_cache
+from string import Template
+
+TEMPLATES = {
+    # dbt config block per materialization; $settings holds optional ",\n        key=value" lines
+    'model_config': """{{ config(
+        schema='$schema',
+        tags=['$table'],
+        alias='$table',
+        materialized='$materialization',
+        transient=$transient$settings
+)}}""",
+    'model_config.lnd_load': """{{ config(
+        schema='$schema',
+        tags=['$table'],
+        alias='$table',
+        transient=$transient$settings
+)}}""",
+    'model_config.truncate_load': """{{ config(
+        schema='$schema',
+        tags=['$table'],
+        alias='$table',
+        materialized='table',
+        transient=$transient,
+        pre_hook=["TRUNCATE TABLE $target_name"]$settings
+)}}""",
+    'model_header': """$model_config
+
+-- Model: $target_name
+-- Source: $source_db.$source_schema.$source_table
+
+""",
+    'merge_statement': """MERGE INTO $target_name AS target
+USING (
+$using_query
+) AS source
+ON $on_condition
+WHEN MATCHED$matched_condition THEN UPDATE SET
+$update_clauses
+WHEN NOT MATCHED THEN INSERT (
+$insert_columns
+) VALUES (
+$insert_values
+);""",
+    'merge_macro': """{% macro $macro_name() %}
+    {% set query %}
+$statement
+	{% endset %}
+  {% set results = run_query(query) %}
+{% endmacro %}""",
+    'insert_statement': """INSERT INTO $target_name (
+$insert_columns
+)
+$select_query;""",
+    'insert_macro': """{% macro $macro_name()%}
+    {% set query %}
+$statement
+    {% endset %}
+    {% set results = run_query(query) %}
+{% endmacro %}""",
+    # MERGE or INSERT run in batches over the integer range returned by $bounds_query
+    'batched_macro': """{% macro $macro_name() %}
+    {% set bounds_query %}
+$bounds_query
+    {% endset %}
+    {% set bounds = run_query(bounds_query) %}
+    {% if bounds.rows[0][0] is not none %}
+        {% for batch_start in range(bounds.rows[0][0] | int, bounds.rows[0][1] | int + 1, $batch_size) %}
+            {% set batch_end = batch_start + $batch_size %}
+            {% do log("$macro_name: batch " ~ batch_start ~ " to " ~ batch_end, info=True) %}
+            {% set query %}
+$statement
+            {% endset %}
+            {% set results = run_query(query) %}
+        {% endfor %}
+    {% endif %}
+{% endmacro %}""",
+    # Airflow DAG per DAG type
+    'dag.CRON': """
+from airflow import Dataset
+from common.classes.dag_utility import DAG_Helper, workspace_name, workspace_env
+
+SCHEMA_NAME, MODEL_TYPE, MODEL_NAME = '$schema_name', '$model_type', '$model_name'
+DBT_JOB_NAME = SCHEMA_NAME + '_' + MODEL_NAME
+
+dag_helper = DAG_Helper()
+dag = dag_helper.generate_DAG(SCHEMA_NAME, MODEL_TYPE, MODEL_NAME, schedule='$schedule')
+
+with dag:
+    dbt_airflow_task = dag_helper.generate_dbt_python_task(DBT_JOB_NAME)
+""",
+    'dag.DATASET': """
+from airflow import Dataset
+from common.classes.dag_utility import DAG_Helper, workspace_name, workspace_env
+
+SCHEMA_NAME, MODEL_TYPE, MODEL_NAME = '$schema_name', '$model_type', '$model_name'
+DBT_JOB_NAME = SCHEMA_NAME + '_' + MODEL_NAME
+
+DAG_SCHEDULE = [
+    $schedule
+]
+
+dag_helper = DAG_Helper()
+dag = dag_helper.generate_DAG(SCHEMA_NAME, MODEL_TYPE, MODEL_NAME, schedule=DAG_SCHEDULE)
+
+with dag:
+    dbt_airflow_task = dag_helper.generate_dbt_python_task(DBT_JOB_NAME)
+""",
+    'dag.SNS': """
+from common.classes.dag_utility import DAG_Helper
+
+DOMAIN_NAME, MODEL_TYPE, DP_NAME = '$domain_name', 'SNS_DPND', '$model_name'
+DBT_JOB_NAME = DOMAIN_NAME + '_' + DP_NAME
+
+dag_helper = DAG_Helper()
+dag = dag_helper.generate_DAG(MODEL_TYPE + '_' + DOMAIN_NAME, MODEL_TYPE, DP_NAME, schedule=None)
+
+with dag:
+    dbt_airflow_task = dag_helper.generate_dbt_python_task(DBT_JOB_NAME)
+""",
+}
+
+
+@lru_cache(maxsize=None)
+def get_template(name):
+    """Compile a named template once and reuse it"""
+    return Template(TEMPLATES[name])
+
+
+def render_template(name, **values):
+    """Render a named template; a missing value raises KeyError"""
+    return get_template(name).substitute(values)
+
+
+def model_config_template(materialization):
+    """Name of the config block template for a materialization"""
+    name = f"model_config.{materialization}"
+    return name if name in TEMPLATES else 'model_config'